@@ -1,11 +1,5 @@
 # Load packages
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import altair as alt
-import plotly.express as px
-from pathlib import Path
 from style import custom_sidebar_css
 
 
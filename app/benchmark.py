@@ -0,0 +1,179 @@
+#load packages
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from synthetic import SIZES, write_exports
+from create_init import clean, clean_many
+from store import ShotStore
+from ingest_manifest import IngestManifest
+from update_master import ingest
+from process import Preprocessor
+from utils import filter_data
+from rollup import RollupCube, metric_summary, session_means, club_means
+from bins import binned
+from charts import downsample
+from trendline import ols_lines, lowess_curve
+from registry import ModelRegistry
+from cache import shared_cache
+
+
+class Benchmark:
+    '''
+    Times (best of `repeat` runs) and peak traced memory (one extra run under tracemalloc) of each step.
+    shared_cache is cleared before every run, so each one measures the computation and not a cache hit.
+    Results are appended as one JSON line per suite run so versions can be compared.
+    '''
+    def __init__(self, repeat = 3, memory = True):
+        self.repeat = repeat
+        self.memory = memory
+        self.results = []
+
+    def run(self, name, fn, repeat = None, rows = None):
+        times = []
+        for _ in range(repeat or self.repeat):
+            shared_cache.clear()
+            start = time.perf_counter()
+            value = fn()
+            times.append(time.perf_counter() - start)
+        peak = None
+        if self.memory:
+            shared_cache.clear()
+            tracemalloc.start()
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        result = {'name': name, 'seconds': min(times), 'runs': len(times),
+                  'peak_mb': round(peak / 1e6, 2) if peak is not None else None, 'rows': rows}
+        self.results.append(result)
+        peak_txt = f", peak {result['peak_mb']} MB" if peak is not None else ''
+        print(f"{name:<32} {result['seconds'] * 1000:10.1f} ms{peak_txt}")
+        return value
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_suite(n, rf_rows = 2000, repeat = 3, memory = True, workers = 1, out = 'bench_results.jsonl'):
+    bench = Benchmark(repeat=repeat, memory=memory)
+    work = Path(tempfile.mkdtemp(prefix='simshot_bench_'))
+    try:
+        #synthetic exports -> clean -> ingest into a scratch store
+        paths = write_exports(n, work / 'exports')
+        bench.run('clean (one export)', lambda: clean(paths[0]), rows=200)
+        bench.run('clean_many', lambda: clean_many(paths, workers=workers), repeat=1, rows=n)
+
+        def ingest_all():
+            shutil.rmtree(work / 'store', ignore_errors=True)
+            if os.path.exists(work / 'ingest.db'):
+                os.remove(work / 'ingest.db')
+            store = ShotStore(root=work / 'store')
+            manifest = IngestManifest(db=work / 'ingest.db')
+            try:
+                return ingest(paths, store, manifest, workers=workers)
+            finally:
+                manifest.close()
+        bench.run('update_master.ingest', ingest_all, repeat=1, rows=n)
+
+        #load / process straight from the scratch store
+        store = ShotStore(root=work / 'store')
+        bench.run('Preprocessor.load_data', lambda: Preprocessor(store=store).load_data(), rows=n)
+        p = Preprocessor(store=store)
+        p.load_data()
+        data = bench.run('Preprocessor.process_data', p.process_data, rows=n)
+
+        #filter + tab aggregations over the processed frame
+        rng = np.random.default_rng(0)
+        dates = data['Date'].sort_values().to_numpy()
+        clubs = [str(c) for c in data['Club'].unique()]
+        queries = []
+        for _ in range(100):
+            lo, hi = np.sort(rng.choice(dates, 2))
+            kind = rng.choice(3, p=[0.4, 0.3, 0.3]) #all clubs / one club / multiselect
+            selection = 'All' if kind == 0 else clubs[rng.integers(len(clubs))] if kind == 1 else list(rng.choice(clubs, 3))
+            queries.append(((lo, hi), selection))
+        bench.run('filter_data (100 queries)', lambda: [filter_data(data, dr, club) for dr, club in queries], rows=data.shape[0])
+
+        date_range = (data['Date'].min(), data['Date'].max())
+        def rollup_rebuild():
+            cube = RollupCube(store)
+            for f in [cube.file, cube.state_file]:
+                if f.exists():
+                    os.remove(f)
+            return cube.sync().load()
+        cube = bench.run('rollup sync (rebuild)', rollup_rebuild, repeat=1)
+        def perform_tab():
+            metric_summary(cube, date_range, 'All', 'Carry')
+            grouped = session_means(cube, date_range, 'All', 'DistanceToPin')
+            return ols_lines(grouped, 'Date', 'DistanceToPin', group='Club')
+        def aoa_tab():
+            chart = filter_data(data, date_range, 'All')
+            club_means(cube, date_range, 'AoA')
+            downsample(chart, 'AoA', 'Carry')
+            return binned(chart, 'CarryBin', AoA=('AoA', 'mean'))
+        def smash_tab():
+            chart = filter_data(data, date_range, clubs)
+            return binned(chart, 'SmashBin', AvgDistanceToPin=('DistanceToPin', 'mean'), Count=('DistanceToPin', 'count'))
+        def spin_tab():
+            chart = filter_data(data, date_range, 'All')
+            downsample(chart, 'BackSpin', 'Carry')
+            return lowess_curve(chart, 'BackSpin', 'Carry')
+        bench.run('sessions: performance tab', perform_tab, rows=data.shape[0])
+        bench.run('sessions: angle of attack tab', aoa_tab, rows=data.shape[0])
+        bench.run('sessions: smash factor tab', smash_tab, rows=data.shape[0])
+        bench.run('sessions: spin tab', spin_tab, rows=data.shape[0])
+
+        #random forest on a sample - the grid search cost grows with rows x 48 configs x folds
+        if rf_rows > 0:
+            from rf_model import RunRandomForest #model steps only (sklearn / shap)
+            sample = data.sample(min(rf_rows, data.shape[0]), random_state=0)
+            reg = RunRandomForest(sample, 'Carry')
+            reg.onehotencode()
+            reg.split_data(size = 0.3)
+            bench.run('RunRandomForest.fit (halving)', lambda: reg.fit(cv=5, search='halving'), repeat=1, rows=sample.shape[0])
+            bench.run('RunRandomForest.fit (grid)', lambda: reg.fit(cv=5), repeat=1, rows=sample.shape[0])
+            shap_vals = bench.run('RunRandomForest.shap_values (approx)', reg.shap_values, repeat=1, rows=reg.X_test.shape[0])
+            bench.run('RunRandomForest.shap_values (exact)', lambda: reg.shap_values(mode='exact'), repeat=1, rows=reg.X_test.shape[0])
+            #repeat request served from the on-disk registry instead of refitting
+            registry = ModelRegistry(store)
+            key = [store.content_hash(), 'rf', 'Carry', 'All', []]
+            registry.put(key, reg.tuned_rf, dict(zip(['oob', 'mse', 'r2'], reg.evaluate())), reg.feature_importance(top_n=10), shap_vals)
+            bench.run('ModelRegistry.get', lambda: registry.get(key), rows=reg.X_test.shape[0])
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    record = {'run_at': datetime.datetime.now().isoformat(), 'commit': git_commit(), 'shots': n,
+              'python': platform.python_version(), 'pandas': pd.__version__,
+              'numpy': np.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count(), 'results': bench.results}
+    with open(out, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"Results appended to {os.path.abspath(out)}")
+    return record
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='End-to-end benchmarks on synthetic shots')
+    parser.add_argument('--shots', default='10k', help='shots written as exports and ingested, or a preset (10k, 1m, 10m)')
+    parser.add_argument('--rf-rows', type=int, default=2000, help='rows sampled for the random forest steps (0 = skip)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per step, best is kept')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run of each step')
+    parser.add_argument('--workers', type=int, default=1, help='clean worker processes')
+    parser.add_argument('--out', default='bench_results.jsonl', help='json lines file results are appended to')
+    args = parser.parse_args()
+    n = SIZES.get(args.shots.lower()) or int(args.shots)
+    run_suite(n, rf_rows=args.rf_rows,
+              repeat=args.repeat, memory=not args.no_memory, workers=args.workers, out=args.out)
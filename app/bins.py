@@ -0,0 +1,66 @@
+#load packages
+import numpy as np
+import pandas as pd
+
+#bin code column -> (source column, edges, labels); bins are [left, right) like pd.cut(right=False)
+BIN_SCHEMES = {
+    'CarryBin': ('Carry',
+                 [0, 50, 75, 100, 125, 150, 175, 200, 225],
+                 ['0–50', '50–75', '75–100', '100-125', '125-150', '150–175', '175–200', '200-225']),
+    'SmashBin': ('SmashFactor',
+                 [0.5, 1.0, 1.1, 1.15, 1.2, 1.25, 1.3, 1.35, 1.4, 1.45, 1.5, 1.55, 1.6],
+                 ['0.5–1', '1–1.1', '1.1-1.15', '1.15-1.2', '1.2-1.25', '1.25-1.3', '1.3–1.35', '1.35–1.4', '1.4-1.45', '1.45-1.5', '1.5-1.55', '1.55-1.6']),
+}
+BIN_COLUMNS = list(BIN_SCHEMES)
+NO_BIN = -1 #missing / removed as an outlier / outside the edges
+
+
+#int8 code of each value's bin - values are rounded like Preprocessor.round_vals first so codes match the cleaned frame
+def bin_codes(values, edges):
+    values = values.round(3).to_numpy() if isinstance(values, pd.Series) else np.round(values, 3)
+    codes = np.searchsorted(np.asarray(edges, dtype=values.dtype), values, side='right') - 1
+    codes[(codes < 0) | (codes >= len(edges) - 1) | np.isnan(values)] = NO_BIN
+    return codes.astype(np.int8)
+
+
+#codes for every scheme whose source column is present (run at ingest, stored with the segment)
+def add_bin_codes(df):
+    for name, (source, edges, _) in BIN_SCHEMES.items():
+        if source in df.columns:
+            df[name] = bin_codes(df[source], edges)
+    return df
+
+
+def sync_bin_codes(df):
+    '''
+    Keep stored codes in line with the cleaned values - shots whose source value was removed as an
+    outlier get NO_BIN, codes missing from older segments (or the csv fallback) are filled in.
+    '''
+    for name, (source, edges, _) in BIN_SCHEMES.items():
+        if source not in df.columns:
+            continue
+        if name not in df.columns:
+            df[name] = bin_codes(df[source], edges)
+            continue
+        codes = df[name].to_numpy(dtype=np.int8, copy=True)
+        values = df[source]
+        repair = (codes == NO_BIN) & values.notna().to_numpy()
+        if repair.any():
+            codes[repair] = bin_codes(values[repair], edges)
+        codes[values.isna().to_numpy()] = NO_BIN
+        df[name] = codes
+    return df
+
+
+#labels for a series of codes, ordered like the scheme's edges
+def bin_labels(name, codes):
+    labels = BIN_SCHEMES[name][2]
+    return pd.Categorical.from_codes(np.asarray(codes, dtype=np.int64), categories=labels, ordered=True)
+
+
+#aggregate per bin over the valid codes - a groupby on a small int column, no re-cut of the frame
+def binned(df, name, **aggs):
+    valid = df[df[name] != NO_BIN]
+    out = valid.groupby(name, sort=True).agg(**aggs).reset_index()
+    out[name] = bin_labels(name, out[name])
+    return out
@@ -0,0 +1,105 @@
+#load packages
+import os
+import sys
+import threading
+import pandas as pd
+import numpy as np
+from collections import OrderedDict
+
+
+#approximate in-memory size of a cached value
+def nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(nbytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class VersionedCache:
+    '''
+    Process-wide LRU cache shared by every page and browser session.
+    Keys start with the data version, so a new ingest commit produces new keys and
+    entries for older versions are dropped. Total size is bounded by max_bytes.
+    Cached frames are shared - treat them as read-only.
+    '''
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() #key -> (value, size)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.key_locks = {} #one compute per key, concurrent sessions wait for it
+
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self.lock:
+                if key in self.entries: #computed by another session while we waited
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return self.entries[key][0]
+                self.misses += 1
+            value = compute()
+            self.put(key, value)
+            with self.lock:
+                self.key_locks.pop(key, None)
+            return value
+
+    #cached value or None, never computes (pages polling a background job)
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            return None
+
+    def put(self, key, value):
+        size = nbytes(value)
+        with self.lock:
+            self.invalidate(key[0])
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.size += size
+            #evict least recently used, always keep the newest entry
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, (_, old_size) = self.entries.popitem(last=False)
+                self.size -= old_size
+
+    #drop entries built from a different version of the same source
+    def invalidate(self, version):
+        source = version[0] if isinstance(version, tuple) else None
+        for key in list(self.entries):
+            old = key[0]
+            if isinstance(old, tuple) and old[0] == source and old != version:
+                self.size -= self.entries.pop(key)[1]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {'entries': len(self.entries), 'bytes': self.size, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
+
+
+#memory bound from SIMSHOT_CACHE_MB (default 512 MB)
+shared_cache = VersionedCache(max_bytes=int(float(os.environ.get('SIMSHOT_CACHE_MB', 512)) * 1024 * 1024))
@@ -0,0 +1,58 @@
+#load packages
+import os
+import numpy as np
+import plotly.graph_objects as go
+
+#above this many points scatter charts switch to WebGL traces + server-side downsampling (SIMSHOT_SCATTER_POINTS)
+LARGE_SCATTER_POINTS = int(os.environ.get('SIMSHOT_SCATTER_POINTS', 20000))
+
+
+def downsample(df, x, y, max_points = LARGE_SCATTER_POINTS, bins = 100, seed = 0):
+    '''
+    Density-preserving sample of a scatter - points are bucketed on a bins x bins grid over (x, y)
+    and every cell keeps the same fraction of its points, rounded up so sparse cells (outliers, tails)
+    always keep at least one. Returns the frame untouched when it is already small enough.
+    Rows with a missing x or y are dropped since they are never drawn.
+    '''
+    xs = df[x].to_numpy(dtype=np.float64)
+    ys = df[y].to_numpy(dtype=np.float64)
+    valid = np.flatnonzero(~(np.isnan(xs) | np.isnan(ys)))
+    if len(valid) <= max_points:
+        return df.iloc[valid] if len(valid) < df.shape[0] else df
+
+    xs, ys = xs[valid], ys[valid]
+    def cell(v):
+        span = v.max() - v.min()
+        if span == 0:
+            return np.zeros(len(v), dtype=np.int64)
+        return np.minimum(((v - v.min()) / span * bins).astype(np.int64), bins - 1)
+    cells = cell(xs) * bins + cell(ys)
+
+    #random rank of each point within its cell, keep the first ceil(count * frac)
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permutation(len(cells))
+    by_cell = shuffled[np.argsort(cells[shuffled], kind='stable')]
+    counts = np.bincount(cells, minlength=bins * bins)
+    starts = np.cumsum(counts) - counts
+    rank = np.empty(len(cells), dtype=np.int64)
+    rank[by_cell] = np.arange(len(cells)) - starts[cells[by_cell]]
+    quota = np.ceil(counts * (max_points / len(cells))).astype(np.int64)
+    keep = np.sort(np.flatnonzero(rank < quota[cells]))
+    return df.iloc[valid[keep]]
+
+
+#go.Scatter for small inputs, downsampled go.Scattergl above the threshold - returns (trace, points drawn)
+def scatter_trace(df, x, y, max_points = LARGE_SCATTER_POINTS, **kwargs):
+    drawn = downsample(df, x, y, max_points)
+    trace = go.Scattergl if df.shape[0] > max_points else go.Scatter
+    return trace(x=drawn[x], y=drawn[y], **kwargs), drawn.shape[0]
+
+
+#caption text for charts that may not draw every shot - based on what was drawn (downsample can keep every row)
+#(below the threshold only shots missing a value are left out, above it traces are WebGL)
+def points_caption(drawn, total, max_points = LARGE_SCATTER_POINTS):
+    webgl = total > max_points
+    if drawn >= total:
+        return f"Showing {drawn:,} shots" + (" (WebGL)" if webgl else '')
+    reason = 'density-preserving sample, WebGL' if webgl else 'shots missing a value left out'
+    return f"Showing {drawn:,} of {total:,} shots ({reason})"
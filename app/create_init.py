@@ -1,11 +1,12 @@
 #load packages
 import pandas as pd
-import numpy as np
-import os
-import json
-import datetime
-import traceback
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from units import normalize_units
+
+#parse timestamp from gspro export filename
+def export_ts(file):
+    ts_str = str(file).split("export")[-1].split(".csv")[0]
+    return pd.to_datetime(ts_str, format='%m-%d-%y-%H-%M-%S') #convert to dt 
 
 #function to clean up csv files
 def clean(file):
@@ -15,21 +16,58 @@ def clean(file):
     #1 extract timestamp from filename
     #2 remove cols with 0 across all rows
     #3 add col with timestamp
-    #4 standardize distance to pin : all --> yards
-    #5 replace ft with yds
-    #6 drop original distancetopin col
+    #4 standardize unit-suffixed cols (distance to pin yds/ft/m) --> float yards, one vectorized pass
     ''' 
-    ts_str = str(file).split("export")[-1].split(".csv")[0]
-    dt = pd.to_datetime(ts_str, format='%m-%d-%y-%H-%M-%S') #convert to dt 
+    dt = export_ts(file)
     df = pd.read_csv(file)
     clean = df.loc[:, (df!=0).all(axis=0)].copy() #drop zero cols
     clean['Date'] = dt 
-    clean['DistanceToPin_Yrds'] = clean['DistanceToPin'].apply(lambda x: round(float(x.split(" ")[0])/3, 2) if 'ft' in str(x.split(" ")[1]) else x) #change to yrds
-    clean['DistanceToPin_Yrds'] = clean['DistanceToPin'].apply(lambda x: f"{x.split(' ')[0]} yds" if "ft" in x else x)
-    clean = clean.drop('DistanceToPin', axis = 1)
+    clean = normalize_units(clean) #numeric yards stored once, no string round trip
     return clean
 
 
+#clean a single export for the worker pool - errors are returned, not raised
+def clean_export(file):
+    try:
+        df = clean(file)
+        df = df.iloc[1:, :] #drop header row 
+        return df, None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {str(e)}"
+
+
+#export timestamp order - names that don't parse go last and fail in clean_export like any other bad file
+def export_order(file):
+    try:
+        return (0, export_ts(file))
+    except Exception:
+        return (1, pd.Timestamp.min)
+
+
+def clean_many(files, workers = 1, use_threads = False):
+    '''
+    Clean export files concurrently (process pool by default, thread pool for I/O bound runs).
+    Results come back in export timestamp order regardless of which worker finishes first.
+    Returns (frames, cleaned files, failures) - failures = {file: error}, a bad file does not abort the batch
+    '''
+    files = sorted(files, key=export_order)
+    if workers <= 1 or len(files) <= 1:
+        results = [clean_export(f) for f in files]
+    else:
+        pool = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+        with pool(max_workers=workers) as executor:
+            results = list(executor.map(clean_export, files)) #map keeps input order
+
+    frames, cleaned, failures = [], [], {}
+    for f, (df, err) in zip(files, results):
+        if err is None:
+            frames.append(df)
+            cleaned.append(f)
+        else:
+            failures[f] = err
+    return frames, cleaned, failures
+
+
 
 ############## DO NOT RERUN - CREATION OF INITIAL MASTER DATA AND LOG FILE ###############
 # #set paths 
@@ -1,11 +1,7 @@
 # Load packages
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
 from pathlib import Path
-import altair as alt
-import plotly.express as px
 
 #page setup
 st.set_page_config(
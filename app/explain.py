@@ -0,0 +1,100 @@
+#load packages
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import shap
+from joblib import Parallel, delayed
+from cache import shared_cache
+from perf import timed
+
+#defaults from SIMSHOT_SHAP_MODE (approx / exact), SIMSHOT_SHAP_ROWS (rows per club, 0 = all) and SIMSHOT_SHAP_WORKERS
+SHAP_MODE = os.environ.get('SIMSHOT_SHAP_MODE', 'approx').lower()
+SHAP_ROWS_PER_CLUB = int(os.environ.get('SIMSHOT_SHAP_ROWS', 200))
+SHAP_WORKERS = int(os.environ.get('SIMSHOT_SHAP_WORKERS', min(4, os.cpu_count() or 1)))
+#rows x trees below which worker processes cost more than they save - starting the pool and sending the forest
+#to each worker takes ~1-2 s, so only ~3 s of serial work goes parallel (exact TreeSHAP is ~1000x slower per row-tree)
+PARALLEL_MIN_WORK = {'approx': 2_500_000, 'exact': 2_000}
+
+
+def stratified_sample(groups, per_group, seed = 0):
+    '''Positions of up to per_group random rows of every group, in their original order (None / 0 = every row).
+    Missing group labels (e.g. a null club) form their own group.'''
+    groups = pd.Series(np.asarray(groups))
+    if not per_group:
+        return np.arange(len(groups))
+    rng = np.random.default_rng(seed)
+    rank = pd.Series(rng.permutation(len(groups))).groupby(groups.to_numpy(), dropna=False).rank(method='first')
+    return np.flatnonzero(rank.to_numpy() <= per_group)
+
+
+#hash of the fitted trees (structure, thresholds, leaf values) + params - identifies the model being explained
+def model_fingerprint(model):
+    h = hashlib.blake2b(digest_size=12)
+    h.update(json.dumps(model.get_params(), sort_keys=True, default=str).encode())
+    for est in getattr(model, 'estimators_', [model]):
+        tree = est.tree_
+        for arr in (tree.children_left, tree.children_right, tree.feature, tree.threshold, tree.value):
+            h.update(np.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()
+
+
+def _frame_fingerprint(X):
+    h = hashlib.blake2b(digest_size=12)
+    h.update(json.dumps([str(c) for c in X.columns]).encode())
+    h.update(pd.util.hash_pandas_object(X, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _values(explainer, X, approximate):
+    if approximate:
+        return explainer.shap_values(X, approximate=True) #Saabas attributions - one pass down each tree
+    return explainer.shap_values(X) #exact values are checked to add up to the prediction
+
+
+#one chunk per worker process - the forest is pickled to each worker once
+def _chunk_values(model, X, approximate):
+    return _values(shap.TreeExplainer(model), X, approximate)
+
+
+class ShapEngine:
+    '''
+    Bounded-cost SHAP for the tree models.
+        mode='approx' - Saabas path attributions (interactive pages), 'exact' - TreeSHAP (reports)
+        per_club      - rows explained per club, sampled at random within each club so rare clubs
+                        keep their rows; cost stays ~ per_club x clubs however large the test split
+        workers       - worker processes, each explaining one chunk of the sampled rows; only used once
+                        rows x trees passes PARALLEL_MIN_WORK - below it runs serially
+    Results are cached in shared_cache under a fingerprint of the fitted model and the sampled rows,
+    so a refit (even of the same selection) never gets another model's values back.
+    '''
+    def __init__(self, mode = SHAP_MODE, per_club = SHAP_ROWS_PER_CLUB, workers = SHAP_WORKERS, seed = 0):
+        if mode not in ('approx', 'exact'):
+            raise ValueError(f"Unknown SHAP mode '{mode}', expected 'approx' or 'exact'")
+        self.mode = mode
+        self.per_club = per_club
+        self.workers = max(1, workers)
+        self.seed = seed
+
+    def parallel(self, rows, trees):
+        return self.workers > 1 and rows * trees >= PARALLEL_MIN_WORK[self.mode]
+
+    @timed('shap.explain')
+    def explain(self, model, X, clubs = None):
+        '''SHAP values of the sampled rows and their X index labels'''
+        rows = stratified_sample(clubs if clubs is not None else np.zeros(X.shape[0]), self.per_club, self.seed)
+        sample = X.iloc[rows]
+        #model fingerprint leads the key - entries of different models never invalidate each other
+        key = ((f"shap:{model_fingerprint(model)}",), _frame_fingerprint(sample), self.mode)
+        def compute():
+            approximate = self.mode == 'approx'
+            trees = len(getattr(model, 'estimators_', [model]))
+            if not self.parallel(sample.shape[0], trees):
+                values = _chunk_values(model, sample, approximate)
+            else:
+                chunks = np.array_split(np.arange(sample.shape[0]), self.workers)
+                parts = Parallel(n_jobs=self.workers)(delayed(_chunk_values)(model, sample.iloc[idx], approximate) for idx in chunks)
+                values = np.concatenate(parts)
+            return np.asarray(values), sample.index
+        return shared_cache.get_or_compute(key, compute)
@@ -0,0 +1,110 @@
+#load packages
+import os
+import json
+import sqlite3
+import hashlib
+import datetime
+from pathlib import Path
+
+
+#sha256 of the file contents, read in chunks
+def file_hash(path, chunk_size = 1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class IngestManifest:
+    '''
+    Ingest manifest keyed by file content hash (sqlite, replaces the growing log.json list)
+        files    - one row per ingested export: (hash, name) -> rows contributed
+        seen     - stat cache name -> (size, mtime, hash) so unchanged files are never re-hashed
+        failures - exports that failed to clean, retried on the next run
+        runs     - one row appended per ingest run
+    Every write is a small indexed insert/update, nothing is rewritten in full.
+    '''
+    def __init__(self, db = 'ingest.db'):
+        self.path = Path(__file__).resolve().parent
+        self.db_file = self.path / db
+        self.conn = sqlite3.connect(self.db_file)
+        with self.conn:
+            self.conn.executescript('''
+                CREATE TABLE IF NOT EXISTS files (
+                    hash TEXT, name TEXT, rows INTEGER, ingested_at TEXT, store_version INTEGER,
+                    PRIMARY KEY (hash, name));
+                CREATE INDEX IF NOT EXISTS files_name ON files(name);
+                CREATE TABLE IF NOT EXISTS seen (
+                    name TEXT PRIMARY KEY, size INTEGER, mtime REAL, hash TEXT);
+                CREATE TABLE IF NOT EXISTS failures (
+                    name TEXT PRIMARY KEY, hash TEXT, error TEXT, failed_at TEXT);
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, run_at TEXT, status TEXT, error TEXT,
+                    store_version INTEGER, files_processed TEXT, files_failed TEXT);
+            ''')
+
+    def close(self):
+        self.conn.close()
+
+    def is_empty(self):
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0] == 0
+
+    #hash of a file, reusing the cached hash when name/size/mtime are unchanged
+    def hash(self, path):
+        st = os.stat(path)
+        name = os.path.basename(path)
+        row = self.conn.execute("SELECT size, mtime, hash FROM seen WHERE name = ?", (name,)).fetchone()
+        if row is not None and row[0] == st.st_size and row[1] == st.st_mtime:
+            return row[2]
+        h = file_hash(path)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO seen VALUES (?, ?, ?, ?)", (name, st.st_size, st.st_mtime, h))
+        return h
+
+    #cheap check used before hashing - known name with unchanged size/mtime and already ingested
+    def unchanged(self, entry):
+        row = self.conn.execute(
+            "SELECT s.size, s.mtime FROM seen s JOIN files f ON f.hash = s.hash WHERE s.name = ?", (entry.name,)).fetchone()
+        if row is None:
+            return False
+        st = entry.stat()
+        return row[0] == st.st_size and row[1] == st.st_mtime
+
+    def is_ingested(self, h):
+        return self.conn.execute("SELECT 1 FROM files WHERE hash = ?", (h,)).fetchone() is not None
+
+    #content previously ingested under this name (a re-export with new content replaces it)
+    def hashes_for(self, name):
+        return [r[0] for r in self.conn.execute("SELECT hash FROM files WHERE name = ?", (name,))]
+
+    def record(self, ingested, failures, store_version):
+        '''ingested = [(hash, name, rows)], failures = {name: (hash, error)} - one transaction'''
+        now = datetime.datetime.now().isoformat()
+        with self.conn:
+            for h, name, rows in ingested:
+                self.conn.execute("DELETE FROM files WHERE name = ? AND hash != ?", (name, h))
+                self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", (h, name, rows, now, store_version))
+                self.conn.execute("DELETE FROM failures WHERE name = ?", (name,))
+            for name, (h, err) in failures.items():
+                self.conn.execute("INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?)", (name, h, err, now))
+
+    def log_run(self, status, err, store_version, processed, failed):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs (run_at, status, error, store_version, files_processed, files_failed) VALUES (?, ?, ?, ?, ?, ?)",
+                (datetime.datetime.now().isoformat(), status, err, store_version, json.dumps(processed), json.dumps(failed)))
+
+    def runs(self, n = 10):
+        cur = self.conn.execute("SELECT run_at, status, error, store_version, files_processed, files_failed FROM runs ORDER BY id DESC LIMIT ?", (n,))
+        cols = ['run_at', 'status', 'error', 'store_version', 'files_processed', 'files_failed']
+        return [dict(zip(cols, r)) for r in cur]
+
+    #one-off import of the old log.json history
+    def import_log(self, current_log):
+        with self.conn:
+            for l in current_log:
+                self.conn.execute(
+                    "INSERT INTO runs (run_at, status, error, store_version, files_processed, files_failed) VALUES (?, ?, ?, ?, ?, ?)",
+                    (l.get('last_run'), l.get('status'), l.get('error'), l.get('store_version'),
+                     json.dumps(l.get('files_processed', [])), json.dumps(l.get('files_failed', {}))))
@@ -0,0 +1,127 @@
+#load packages
+import os
+import time
+import uuid
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    '''
+    One background computation. The worker reports progress through update() (which raises
+    JobCancelled once cancel() was called, so cancellation lands at the next progress point);
+    pages read status / progress / result without blocking.
+    '''
+    def __init__(self, key, fn):
+        self.id = uuid.uuid4().hex[:8]
+        self.key = key
+        self.fn = fn
+        self.status = 'queued' #queued -> running -> done | failed | cancelled
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def update(self, **progress):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        with self._lock:
+            self.progress = {**self.progress, **progress}
+
+    def cancel(self):
+        self._cancel.set()
+        with self._lock:
+            if self.status == 'queued': #never started - the worker skips it
+                self.status = 'cancelled'
+                self.finished = time.time()
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def active(self):
+        return self.status in ('queued', 'running')
+
+    def snapshot(self):
+        with self._lock:
+            return {'id': self.id, 'status': self.status, 'progress': dict(self.progress), 'error': self.error,
+                    'elapsed': (self.finished or time.time()) - (self.started or self.submitted)}
+
+    def run(self):
+        with self._lock:
+            if self.status != 'queued':
+                return
+            self.status = 'running'
+            self.started = time.time()
+        try:
+            result = self.fn(self)
+            status, error = 'done', None
+        except JobCancelled:
+            result, status, error = None, 'cancelled', None
+        except Exception as e:
+            result, status, error = None, 'failed', f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        with self._lock:
+            self.result, self.status, self.error = result, status, error
+            self.finished = time.time()
+
+
+class JobQueue:
+    '''
+    Process-wide worker pool shared by every page and browser session. Jobs are keyed like the
+    caches (data version first), so concurrent requests for the same model share one job, and
+    reruns of the requesting script never restart it. The latest job per key is kept (finished
+    ones up to `keep`) so pages can poll it, show failures and offer a restart after a cancel.
+    '''
+    def __init__(self, workers, keep = 64):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='simshot-job')
+        self.keep = keep
+        self.jobs = OrderedDict() #key -> latest Job
+        self.lock = threading.Lock()
+
+    def submit(self, key, fn):
+        '''Job for the key - the in-flight one if there is one, else fn(job) queued on the pool'''
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is not None and job.active():
+                return job
+            job = Job(key, fn)
+            self.jobs.pop(key, None)
+            self.jobs[key] = job
+            self._trim()
+        self.pool.submit(job.run)
+        return job
+
+    def get(self, key):
+        with self.lock:
+            return self.jobs.get(key)
+
+    def cancel(self, key):
+        job = self.get(key)
+        if job is not None and job.active():
+            job.cancel()
+        return job
+
+    #forget the oldest finished jobs past `keep`
+    def _trim(self):
+        finished = [k for k, j in self.jobs.items() if not j.active()]
+        for k in finished[:max(0, len(self.jobs) - self.keep)]:
+            del self.jobs[k]
+
+    def stats(self):
+        with self.lock:
+            states = [j.status for j in self.jobs.values()]
+        return {s: states.count(s) for s in ('queued', 'running', 'done', 'failed', 'cancelled')}
+
+
+#worker threads from SIMSHOT_JOB_WORKERS (default 2) - each fit already uses every core
+jobs = JobQueue(workers=int(os.environ.get('SIMSHOT_JOB_WORKERS', 2)))
@@ -1,45 +1,43 @@
 # Load packages
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from pathlib import Path
-import altair as alt
-import plotly.graph_objects as go
 import plotly.express as px
-from PIL import Image
 from plotly.subplots import make_subplots
-from datetime import timedelta
-from style import custom_sidebar_css, custom_metric_card
+from style import custom_sidebar_css, custom_metric_card, tab_selector, plotly_chart, perf_panel, selected_player, player_selector
 from process import Preprocessor
+from store import player_store
+from utils import filter_data, distinct, min_max
+from bins import BIN_COLUMNS, binned as bin_agg
+from cache import shared_cache
+from perf import timed, start_run
+from charts import LARGE_SCATTER_POINTS, downsample, scatter_trace, points_caption
+from trendline import ols_lines, lowess_curve, cached_trend, add_trend_traces
+from rollup import get_rollup, metric_summary, session_means, club_means
 
 
 class SessionsPage:
     def __init__(self):
-        self.data = Preprocessor().get_data()
+        start_run() #new rerun - reset the per-rerun stage timings
+        self.player = selected_player()
+        preprocessor = Preprocessor(store=player_store(self.player)) #only this golfer's partition is loaded
+        self.data = preprocessor.lazy() #out-of-core scans with SIMSHOT_BACKEND=duckdb, read through utils
+        if self.data is None:
+            self.data = preprocessor.get_data()
+        self.version = preprocessor.data_version() #cache key prefix for derived results (trendlines)
+        self.rollup = get_rollup(preprocessor) #per session/club/metric aggregates for cards + trends
         self.tab_labels = ['Performance', 'Angle of Attack', 'Smash Factor', 'Spin Analysis'] #tab labels
-        self.club_filter_opts = ['All'] + list(self.data['Club'].unique()) #club type filter options 
-        self.start_date = self.data['Date'].min()
-        self.end_date = self.data['Date'].max() + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-        self.not_metrics = ['Date', 'Unnamed: 0', 'Club', 'Decent']
+        self.clubs = distinct(self.data, 'Club') #pushed-down distinct / min-max on the lazy backend
+        self.club_filter_opts = ['All'] + self.clubs #club type filter options 
+        self.start_date, last_date = min_max(self.data, 'Date')
+        self.end_date = last_date + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+        self.not_metrics = ['Date', 'Unnamed: 0', 'Club', 'Decent'] + BIN_COLUMNS
         self.metric_opts = [i for i in set(self.data.columns) if i not in self.not_metrics]
         self.spin_metrics = ['BackSpin', 'SideSpin', 'rawSpinAxis']
         self.filtered_data = None
     
-    #filter data based on inputs
+    #filter data based on inputs (indexed date/club lookup shared with utils)
     def filter_data(self, date_range, selected_club):
-        filtered = self.data[self.data['Date'].between(pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1]))]
-
-        if isinstance(selected_club, list):
-            if 'All' in selected_club and len(selected_club) == 1:
-                pass  
-            else:
-                filtered = filtered[filtered['Club'].isin(selected_club)]
-        else:
-            if selected_club != 'All':
-                filtered = filtered[filtered['Club'] == selected_club]
-
-        return filtered
+        return filter_data(self.data, date_range, selected_club)
 
 
     
@@ -52,12 +50,16 @@ class SessionsPage:
             key=key
         )
         if 'All' in clubs:
-            return list(self.data['Club'].unique())
+            return list(self.clubs)
         return clubs
 
     def all_club_data(self):
         return self.filter_data(self.date_range, 'All') 
 
+    #per tab results cached by data version + filter state, so switching back to a tab is instant
+    def tab_cache(self, tab, state, compute):
+        return shared_cache.get_or_compute((self.version, tab, tuple(self.date_range)) + tuple(state), compute)
+
     #render tabs 
     def render(self):
         st.set_page_config(
@@ -72,26 +74,27 @@ class SessionsPage:
         #set up sidebar 
         with st.sidebar:
             st.title('Golf Simulation Statistics')
+            player_selector()
             
             #filter for date change
             self.date_range = st.date_input('Date Range', [self.start_date, self.end_date])
             if len(self.date_range) != 2:
                 st.stop() 
 
-        #create tabs and tab methods 
-        tabs = st.tabs(self.tab_labels)
-        for tab, label in zip(tabs, self.tab_labels):
-            with tab:
-                if label == 'Performance':
-                    self.render_perform_tab()
-                elif label == 'Angle of Attack':
-                    self.render_AoA_tab()
-                elif label == 'Smash Factor':
-                    self.render_smash_tab()
-                else:
-                    self.render_spin_tab()
+        #create tabs and tab methods - only the active tab runs its data prep + figures
+        label = tab_selector(self.tab_labels, key='sessions_tab')
+        if label == 'Performance':
+            self.render_perform_tab()
+        elif label == 'Angle of Attack':
+            self.render_AoA_tab()
+        elif label == 'Smash Factor':
+            self.render_smash_tab()
+        else:
+            self.render_spin_tab()
+        perf_panel()
     
     ############## RENDER TAB 1 - PERFORMANCE METRICS ############## 
+    @timed('sessions.render_perform_tab')
     def render_perform_tab(self):
         st.markdown("## Performance Metrics")
         col_filters = st.columns(2)
@@ -102,17 +105,15 @@ class SessionsPage:
         with col_filters[1]:
             self.selected_metric = st.selectbox("Select Metric", self.metric_opts, key='selected_metric_inline')
 
-        filtered_data = self.filter_data(self.date_range, self.selected_club)  #filter data based on selections
-
-        #show metric cards
+        #show metric cards (combined from the rollup partials, no pass over the shots)
         cols = st.columns((1, 4), gap='small')
         with cols[0]:
-            metric_data = filtered_data[self.selected_metric]
-            min_val = metric_data.min()
-            avg_val = metric_data.mean()
-            max_val = metric_data.max()
-            std_val = metric_data.std()
-            count_val = metric_data.count()
+            summary = metric_summary(self.rollup, self.date_range, self.selected_club, self.selected_metric)
+            min_val = summary['min']
+            avg_val = summary['mean']
+            max_val = summary['max']
+            std_val = summary['std']
+            count_val = summary['count']
 
             if not pd.isna(min_val):
                 custom_metric_card(label="Minimum", value=f"{min_val:.1f}")
@@ -130,28 +131,27 @@ class SessionsPage:
             #chart multiselection filter for clubs 
             selected_clubs = self.club_multiselect("perform_chart_club_filter")
 
-            filtered_chart = filtered_data[filtered_data['Club'].isin(selected_clubs)]
-            grouped = (
-                filtered_chart
-                .groupby(['Date', 'Club'])['DistanceToPin']
-                .mean()
-                .reset_index()
-            )
+            grouped = session_means(self.rollup, self.date_range, self.selected_club, 'DistanceToPin')
+            grouped = grouped[grouped['Club'].isin([str(c) for c in selected_clubs])]
 
             fig = px.scatter(
                 grouped,
                 x='Date',
                 y='DistanceToPin',
                 color='Club',
-                trendline='ols',
                 labels={'DistanceToPin': 'Avg Distance to Pin (Yards)'},
                 title=''
             )
+            #per club OLS trend, fit once per filter state
+            trend_key = (self.version, 'ols', tuple(self.date_range), self.selected_club, tuple(selected_clubs))
+            lines = cached_trend(trend_key, lambda: ols_lines(grouped, 'Date', 'DistanceToPin', group='Club'))
+            add_trend_traces(fig, lines, 'Date', 'DistanceToPin', group='Club')
             fig.update_yaxes(rangemode='tozero')
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
 
 
     ############## RENDER TAB 2 - ANGLE OF ATTACK ANALYSIS ############## 
+    @timed('sessions.render_AoA_tab')
     def render_AoA_tab(self):
         st.markdown("## Angle of Attack vs. Carry Distance vs. Peak Height")
         all_club_chart = self.all_club_data()
@@ -170,15 +170,13 @@ class SessionsPage:
         #create secondary y-axis
         fig = make_subplots(specs=[[{"secondary_y": True}]])
 
-        # plot dual axis scatter plot
-        fig.add_trace(
-            go.Scatter(x=filtered_chart['AoA'], y=filtered_chart['Carry'], name="Carry Distance", mode = 'markers', marker=dict(color='blue')),
-            secondary_y=False)
+        # plot dual axis scatter plot (WebGL + downsampled above LARGE_SCATTER_POINTS)
+        carry_trace, carry_drawn = scatter_trace(filtered_chart, 'AoA', 'Carry', name="Carry Distance", mode = 'markers', marker=dict(color='blue'))
+        fig.add_trace(carry_trace, secondary_y=False)
 
         # Use add_trace function and specify secondary_y axes = True.
-        fig.add_trace(
-            go.Scatter(x=filtered_chart['AoA'], y=filtered_chart['PeakHeight'], name="Peak Height", mode= 'markers', marker=dict(color='red')),
-            secondary_y=True)
+        peak_trace, peak_drawn = scatter_trace(filtered_chart, 'AoA', 'PeakHeight', name="Peak Height", mode= 'markers', marker=dict(color='red'))
+        fig.add_trace(peak_trace, secondary_y=True)
 
         # Adding title text to the figure
         # fig4.update_layout(
@@ -191,17 +189,13 @@ class SessionsPage:
         # Naming y-axes
         fig.update_yaxes(title_text="<b>Carry Distance</b>", secondary_y=False)
         fig.update_yaxes(title_text="<b>Peak Height</b> ", secondary_y=True)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
+        st.caption(points_caption(max(carry_drawn, peak_drawn), filtered_chart.shape[0]))
 
         #-----chart 2: AoA vs Club -------#
         cols = st.columns((4, 4), gap='medium')
         with cols[0]:
-            grouped = (
-                all_club_chart
-                .groupby('Club', observed=True)
-                .agg(AoA=('AoA', 'mean'), Count=('AoA', 'count'))
-                .reset_index()
-            )
+            grouped = club_means(self.rollup, self.date_range, 'AoA')
             st.markdown("## Angle of Attacks vs. Club Type")
             #bubble chart 
             fig2 = px.scatter(
@@ -216,18 +210,14 @@ class SessionsPage:
             )
 
             fig2.update_yaxes(range= aoa_range)
-            st.plotly_chart(fig2, use_container_width=True)
+            plotly_chart(fig2, use_container_width=True)
             
         #-----chart 3: AoA vs Club -------#
         with cols[1]:
             st.markdown("## Angle of Attacks vs. Carry Distance")
             
-            #create bins 
-            bin_edges = [0, 50, 75, 100, 125, 150, 175, 200,225]
-            bin_labels = ['0–50', '50–75', '75–100', '100-125', '125-150', '150–175', '175–200', '200-225']
-            all_club_chart = all_club_chart.copy()
-            all_club_chart['CarryBin'] = pd.cut(all_club_chart['Carry'], bins=bin_edges, labels=bin_labels, right=False)
-            binned = all_club_chart.groupby('CarryBin', observed=True).agg({'AoA': 'mean'}).reset_index()
+            #carry bins precomputed at ingest (bins.BIN_SCHEMES)
+            binned = self.tab_cache('AoA_carry_bins', [], lambda: bin_agg(all_club_chart, 'CarryBin', AoA=('AoA', 'mean')))
 
             fig3 = px.bar(
             binned,
@@ -238,10 +228,11 @@ class SessionsPage:
             title=''
         )
             fig3.update_yaxes(range = aoa_range)
-            st.plotly_chart(fig3, use_container_width=True)
+            plotly_chart(fig3, use_container_width=True)
 
     ############## RENDER TAB 3 - SMASH FACTOR ANALYSIS ############## 
 
+    @timed('sessions.render_smash_tab')
     def render_smash_tab(self):
         st.markdown(" ## Smash Factor Analysis")
         all_club_chart = self.all_club_data()
@@ -249,14 +240,10 @@ class SessionsPage:
         filtered_chart = all_club_chart[all_club_chart['Club'].isin(selected_clubs)]
 
 
-        #create bins for smash factor
-        bin_edges = [0.5, 1.0, 1.1, 1.15, 1.2, 1.25, 1.3, 1.35, 1.4, 1.45, 1.5, 1.55, 1.6]
-        bin_labels = ['0.5–1', '1–1.1', '1.1-1.15', '1.15-1.2','1.2-1.25', '1.25-1.3', '1.3–1.35', '1.35–1.4', '1.4-1.45', '1.45-1.5', '1.5-1.55', '1.55-1.6']
-        filtered_chart = filtered_chart.copy()
+        #smash factor bins precomputed at ingest (bins.BIN_SCHEMES)
         total_shots = filtered_chart.shape[0]
-        filtered_chart['SmashBin'] = pd.cut(filtered_chart['SmashFactor'], bins=bin_edges, labels=bin_labels, right=False)
-        binned = filtered_chart.groupby(['SmashBin'], observed=True).agg(AvgDistanceToPin=('DistanceToPin', 'mean'),
-                                                                                 Count=('DistanceToPin', 'count')).reset_index()
+        binned = self.tab_cache('smash_bins', [tuple(selected_clubs)],
+                                lambda: bin_agg(filtered_chart, 'SmashBin', AvgDistanceToPin=('DistanceToPin', 'mean'), Count=('DistanceToPin', 'count')))
         fig = px.bar(
             binned,
             x='SmashBin',
@@ -274,10 +261,11 @@ class SessionsPage:
             },
             title=''
         )
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
         st.caption(f"Total Shots: {total_shots}")
 
     ############## RENDER TAB 4 - SPIN ANALYSIS ############## 
+    @timed('sessions.render_spin_tab')
     def render_spin_tab(self):
         col_filters = st.columns(3)
         self.dist_metrics = ['Carry', 'TotalDistance']
@@ -291,17 +279,24 @@ class SessionsPage:
             self.selected_spin = st.selectbox("Select Metric", self.spin_metrics, key='selected_spin_inline')
 
         filtered_data = self.filter_data(self.date_range, self.selected_club)  #filter data based on selections
+        chart_data = self.tab_cache('spin_sample', [self.selected_club, self.selected_spin, self.selected_dist],
+                                    lambda: downsample(filtered_data, self.selected_spin, self.selected_dist)) #density-preserving sample when large
         
         fig = px.scatter(
-        filtered_data,
+        chart_data,
         x=self.selected_spin,
         y= self.selected_dist,
-        trendline='lowess',  
         color = self.selected_dist,
+        render_mode='webgl' if filtered_data.shape[0] > LARGE_SCATTER_POINTS else 'auto',
         labels={self.selected_spin: self.selected_spin, self.selected_dist: f"{self.selected_dist} (Yards)"}
         )
+        #binned lowess over every filtered shot (not just the drawn sample), fit once per filter state
+        trend_key = (self.version, 'lowess', tuple(self.date_range), self.selected_club, self.selected_spin, self.selected_dist)
+        curve = cached_trend(trend_key, lambda: lowess_curve(filtered_data, self.selected_spin, self.selected_dist))
+        add_trend_traces(fig, curve, self.selected_spin, self.selected_dist, color='#32CD32')
 
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
+        st.caption(points_caption(chart_data.shape[0], filtered_data.shape[0]))
 
 
 #render page
@@ -1,46 +1,114 @@
 #load packages
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly_express as px
-from style import custom_sidebar_css, custom_metric_card
+from style import custom_sidebar_css, custom_metric_card, tab_selector, plotly_chart, perf_panel, selected_player, player_selector
 from process import Preprocessor
+from store import player_store
 from rf_model import RunRandomForest
-from utils import filter_data
+from utils import filter_data, distinct, min_max
+from bins import BIN_COLUMNS
+from cache import shared_cache
+from registry import ModelRegistry
+from jobs import jobs
+from perf import timed, start_run
 
 
 class AnalysisPage():
     def __init__(self):
-        self.data = Preprocessor.get_data()
-        self.start_date = self.data['Date'].min()
-        self.end_date = self.data['Date'].max() + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+        start_run() #new rerun - reset the per-rerun stage timings
+        self.player = selected_player()
+        self.store = player_store(self.player)
+        preprocessor = Preprocessor(store=self.store) #only this golfer's partition is loaded
+        self.data = preprocessor.lazy() #out-of-core scans with SIMSHOT_BACKEND=duckdb, read through utils
+        if self.data is None:
+            self.data = preprocessor.get_data()
+        self.version = preprocessor.data_version() #cache key prefix for tab results
+        self.registry = ModelRegistry(self.store) #tuned forests persisted across restarts
+        self.start_date, last_date = min_max(self.data, 'Date') #pushed-down min / max on the lazy backend
+        self.end_date = last_date + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
         self.distances_opts = ['Carry', 'TotalDistance']
-        self.irons = [i for i in self.data['Club'].unique() if i.startswith("I")]
+        self.irons = [i for i in distinct(self.data, 'Club') if i.startswith("I")]
         self.clubgroup_opts = ['All', 'Irons', 'Driver']
-        self.exclude_opts = [i for i in self.data.columns if i != 'Date']
+        self.exclude_opts = [i for i in self.data.columns if i != 'Date' and i not in BIN_COLUMNS]
         self.tab_labels = ['Insights & Trends', 'Random Forest Analysis', 'Time Series Forecast', 'Optimization']
         self.exclude_cols = None
 
     
-    def load_rf_results(self, selected_target, selected_exclude_cols, selected_club_type):
+    #club group -> club selection for filter_data
+    def group_clubs(self, selected_club_type):
         if selected_club_type == 'Irons':
-            clubs = self.irons
-            self.data = filter_data(self.date_range, clubs)
+            return self.irons
         elif selected_club_type == 'Driver':
-            clubs = 'DR'
-            self.data = filter_data(self.date_range, clubs)
-        else:
-            self.data = filter_data(self.date_range, 'All') 
-
-
-        reg = RunRandomForest(self.data, selected_target, exclude_cols= selected_exclude_cols)
-        reg.onehotencode()
-        reg.split_data(size = 0.3)
-        reg.fit(cv=5)
-        self.oob, self.mse, self.r2 = reg.evaluate()
-        self.feat_imp = reg.feature_importance(top_n=10)
-        self.shap_vals = reg.shap_values()
-        return self.oob, self.mse, self.r2, self.feat_imp, self.shap_vals
+            return 'DR'
+        return 'All'
+
+    @timed('analysis.load_rf_results')
+    def load_rf_results(self, selected_target, selected_exclude_cols, selected_club_type, restart = False):
+        '''
+        Results from memory or the on-disk registry, else None while a background job trains the model.
+        The job is shared with every session asking for the same model and survives reruns of this page;
+        restart=True resubmits after a cancelled / failed job.
+        '''
+        date_range = [str(pd.to_datetime(d)) for d in self.date_range]
+        exclude = sorted(selected_exclude_cols or [])
+        key = (self.version, 'rf-halving', tuple(date_range), selected_target, tuple(exclude), selected_club_type)
+        registry_key = [self.store.content_hash(), 'rf-halving', date_range, selected_target, selected_club_type, exclude]
+        results = shared_cache.get(key)
+        if results is None:
+            stored = self.registry.get(registry_key)
+            if stored is not None:
+                m = stored['metrics']
+                results = (m['oob'], m['mse'], m['r2'], stored['importance'], stored['shap'])
+                shared_cache.put(key, results)
+        if results is not None:
+            self.rf_job = None
+            self.oob, self.mse, self.r2, self.feat_imp, self.shap_vals = results
+            return results
+
+        data, registry = self.data, self.registry
+        date_sel, clubs = self.date_range, self.group_clubs(selected_club_type)
+        #same training inputs on older data - a new ingest (or a later end date) warm-starts this model instead of searching again
+        lineage = ['rf-halving', date_range[0], selected_target, selected_club_type, exclude]
+        def train(job):
+            job.update(stage='Preparing data')
+            reg = RunRandomForest(filter_data(data, date_sel, clubs), selected_target, exclude_cols= selected_exclude_cols)
+            reg.onehotencode()
+            reg.split_data(size = 0.3)
+            report = lambda record, fits, planned, best: job.update(stage='Searching hyperparameters', fits=fits, planned=planned, best_oob=best, rung=record['rung'])
+            previous = registry.latest(lineage, through=date_range[1]) #no model that saw shots past the requested end
+            model = registry.load_model(previous['key']) if previous is not None else None
+            if model is not None:
+                job.update(stage='Updating model')
+                mode = reg.update(model, previous['trained_through'], previous['baseline_mse'],
+                                  max_trees=2 * previous['tuned_trees'], progress=report)
+            else:
+                job.update(stage='Searching hyperparameters', fits=0)
+                #successive halving - a few full-size fits instead of 48 configs x 5 folds, cancellable between fits
+                reg.fit(cv=5, search='halving', progress=report)
+                mode = 'tuned'
+            job.update(stage='Evaluating', mode=mode)
+            oob, mse, r2 = reg.evaluate()
+            feat_imp = reg.feature_importance(top_n=10)
+            job.update(stage='Computing SHAP values')
+            shap_vals = reg.shap_values() #approximate, sampled per club - bounded for large test splits
+            job.update(stage='Saving')
+            #drift is measured against the last full search, warm-start updates carry its baseline forward
+            tuned = mode not in ('updated', 'current')
+            registry.put(registry_key, reg.tuned_rf, {'oob': oob, 'mse': mse, 'r2': r2}, feat_imp, shap_vals,
+                         features=list(reg.X.columns),
+                         extra={'lineage': lineage, 'mode': mode, 'shap_rows': reg.shap_rows.tolist(),
+                                'trained_through': str(reg.data.loc[reg.X_train.index, 'Date'].max()),
+                                'baseline_mse': mse if tuned else previous['baseline_mse'],
+                                'tuned_trees': reg.tuned_rf.n_estimators if tuned else previous['tuned_trees']})
+            results = (oob, mse, r2, feat_imp, shap_vals)
+            shared_cache.put(key, results)
+            return results
+
+        self.rf_job = jobs.get(key)
+        if self.rf_job is None or (restart and not self.rf_job.active()):
+            self.rf_job = jobs.submit(key, train)
+        return None
     
     
     def clubgroup_multiselect(self, key: str):
@@ -65,30 +133,32 @@ class AnalysisPage():
         #set up sidebar 
         with st.sidebar:
             st.title('Golf Simulation Statistics')
+            player_selector()
             
             #filter for date change
             self.date_range = st.date_input('Date Range', [self.start_date, self.end_date])
             if len(self.date_range) != 2:
                 st.stop() 
 
-        #create tabs and tab methods 
-        tabs = st.tabs(self.tab_labels)
-        for tab, label in zip(tabs, self.tab_labels):
-            with tab:
-                if label == 'Insights & Trends':
-                    self.render_insights_tab()
-                elif label == 'Random Forest Analysis':
-                    self.render_rf_tab()
-                elif label == 'Time Series Forecast':
-                    self.render_ts_tab()
-                else:
-                    self.render_optim_tab()
+        #create tabs and tab methods - only the active tab runs (keeps the RF grid search off other tabs' reruns)
+        label = tab_selector(self.tab_labels, key='analysis_tab')
+        if label == 'Insights & Trends':
+            self.render_insights_tab()
+        elif label == 'Random Forest Analysis':
+            self.render_rf_tab()
+        elif label == 'Time Series Forecast':
+            self.render_ts_tab()
+        else:
+            self.render_optim_tab()
+        perf_panel()
 
     ############## RENDER TAB 1 - OVERVIEW OF INSIGHTS ############## 
+    @timed('analysis.render_insights_tab')
     def render_insights_tab(self):
         pass
 
     ############## RENDER TAB 2 - RANDOM FOREST ############## 
+    @timed('analysis.render_rf_tab')
     def render_rf_tab(self):
         st.markdown("## Random Forest Analysis")
         col_filters = st.columns(4)
@@ -100,21 +170,68 @@ class AnalysisPage():
             self.selected_club_type = st.selectbox("Select Club Type", self.clubgroup_opts, key='selected_clubtype_inline')
         
         with col_filters[2]:
-            current_exclude_opts = [col for col in self.data.columns if col not in ['Date', self.selected_target]]
+            current_exclude_opts = [col for col in self.data.columns if col not in ['Date', self.selected_target] + BIN_COLUMNS]
             self.selected_exclude_cols = st.multiselect(
                 "Exclude Features", 
                 current_exclude_opts, 
-                default=current_exclude_opts,
+                default=[],
                 key='rf_exclude_filter'
             )
 
-        filtered_data = filter_data(self.date_range, self.selected_club_type)  #filter data based on selections
-
-
-        
-        
-
-        
-
-
-
+        #training runs on the job queue - this rerun only reads results or the job's progress
+        if self.load_rf_results(self.selected_target, self.selected_exclude_cols, self.selected_club_type) is None:
+            self.render_rf_job()
+        else:
+            self.render_rf_results()
+
+    #polls the background job without rerunning the rest of the page, full rerun once results are in
+    @st.fragment(run_every=1)
+    def render_rf_job(self):
+        job = self.rf_job
+        state = job.snapshot()
+        progress = state['progress']
+        if state['status'] == 'done':
+            st.rerun()
+        elif job.active():
+            planned = progress.get('planned')
+            done = min(progress.get('fits', 0) / planned, 1.0) if planned else 0.0
+            stage = 'Cancelling' if job.cancelled() else progress.get('stage', 'Queued')
+            st.progress(done, text=f"{stage}...")
+            if 'best_oob' in progress:
+                st.caption(f"Fits: {progress['fits']} / {planned} (rung {progress['rung'] + 1}) - best OOB R² so far: {progress['best_oob']:.3f} - {state['elapsed']:.0f}s")
+            if st.button('Cancel Training', key='rf_cancel'):
+                jobs.cancel(job.key)
+        else:
+            if state['status'] == 'failed':
+                st.error(f"Training failed - {state['error']}")
+            else:
+                st.info('Training cancelled')
+            if st.button('Restart Training', key='rf_restart'):
+                self.load_rf_results(self.selected_target, self.selected_exclude_cols, self.selected_club_type, restart=True)
+
+    def render_rf_results(self):
+        cols = st.columns((1, 4), gap='small')
+        with cols[0]:
+            custom_metric_card(label="OOB R²", value=f"{self.oob:.3f}" if not pd.isna(self.oob) else 'n/a') #none after a warm-start update
+            custom_metric_card(label="Test R²", value=f"{self.r2:.3f}")
+            custom_metric_card(label="Test MSE", value=f"{self.mse:.1f}")
+        with cols[1]:
+            fig = px.bar(self.feat_imp.sort_values('Importance'), x='Importance', y='Feature', orientation='h',
+                         title=f"Top Features - {self.selected_target}")
+            plotly_chart(fig, use_container_width=True)
+
+    ############## RENDER TAB 3 - TIME SERIES FORECAST ############## 
+    @timed('analysis.render_ts_tab')
+    def render_ts_tab(self):
+        st.markdown("## Time Series Forecast")
+        st.info("Carry / distance forecasting is not available yet.")
+
+    ############## RENDER TAB 4 - OPTIMIZATION ############## 
+    @timed('analysis.render_optim_tab')
+    def render_optim_tab(self):
+        st.markdown("## Optimization")
+        st.info("Launch condition optimization is not available yet.")
+
+
+#render page
+AnalysisPage().render()
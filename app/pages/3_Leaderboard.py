@@ -0,0 +1,61 @@
+# Load packages
+import streamlit as st
+import pandas as pd
+from style import custom_sidebar_css, perf_panel
+from perf import timed, start_run
+from store import players
+from rollup import leaderboard, clubs
+
+
+class LeaderboardPage:
+    def __init__(self):
+        start_run() #new rerun - reset the per-rerun stage timings
+        self.players = players()
+        self.club_filter_opts = ['All'] + clubs(self.players)
+        self.metric_opts = ['Carry', 'TotalDistance', 'BallSpeed', 'ClubSpeed', 'SmashFactor', 'DistanceToPin']
+        #lower is better for these, everything else ranks high to low
+        self.ascending = {'DistanceToPin': True}
+
+    def render(self):
+        st.set_page_config(
+            page_title="Leaderboard",
+            page_icon="⛳",
+            layout="wide",
+            initial_sidebar_state="expanded"
+        )
+        #inject custom css
+        custom_sidebar_css()
+
+        #set up sidebar
+        with st.sidebar:
+            st.title('Golf Simulation Statistics')
+            self.date_range = st.date_input('Date Range', [pd.Timestamp('2000-01-01'), pd.Timestamp.now().normalize()])
+            if len(self.date_range) != 2:
+                st.stop()
+
+        self.render_board()
+        perf_panel()
+
+    ############## LEADERBOARD ##############
+    @timed('leaderboard.render_board')
+    def render_board(self):
+        st.markdown("## Leaderboard")
+        col_filters = st.columns(2)
+
+        with col_filters[0]:
+            self.selected_club = st.selectbox("Filter by Club", self.club_filter_opts, index=0, key='leaderboard_club')
+
+        with col_filters[1]:
+            self.selected_metric = st.selectbox("Rank by", self.metric_opts, key='leaderboard_metric')
+
+        #end of the day inclusive, like the sessions page
+        date_range = (pd.to_datetime(self.date_range[0]), pd.to_datetime(self.date_range[1]) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1))
+        board = leaderboard(self.players, date_range, self.selected_club, self.metric_opts)
+        board = board[board['Shots'] > 0].sort_values(self.selected_metric, ascending=self.ascending.get(self.selected_metric, False))
+        board.insert(0, 'Rank', range(1, board.shape[0] + 1))
+        st.dataframe(board.round(2), hide_index=True, use_container_width=True)
+        st.caption(f"{board.shape[0]} of {len(self.players)} players with shots in range")
+
+
+#render page
+LeaderboardPage().render()
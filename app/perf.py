@@ -0,0 +1,93 @@
+#load packages
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+#timers are on when SIMSHOT_PERF is set (1/true/yes), records go to SIMSHOT_PERF_LOG (json lines) or stderr
+ENABLED = os.environ.get('SIMSHOT_PERF', '').lower() in ('1', 'true', 'yes', 'on')
+LOG_FILE = os.environ.get('SIMSHOT_PERF_LOG')
+
+_lock = threading.Lock()
+_local = threading.local() #per script thread (one per streamlit session) - stage records of the current rerun
+_NOOP = nullcontext()
+
+
+def emit(record):
+    line = json.dumps(record, default=str)
+    with _lock:
+        if LOG_FILE:
+            with open(LOG_FILE, 'a') as f:
+                f.write(line + '\n')
+        else:
+            print(line, file=sys.stderr)
+
+
+def _records():
+    if not hasattr(_local, 'records'):
+        _local.records = []
+        _local.counters = {}
+    return _local.records
+
+
+class _Timer:
+    def __init__(self, stage, fields):
+        self.stage = stage
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self.start) * 1000
+        record = {'ts': time.time(), 'stage': self.stage, 'ms': round(ms, 3), 'ok': exc_type is None, **self.fields}
+        _records().append(record)
+        emit(record)
+        return False
+
+
+#with timer('stage'): ... - a shared no-op context when disabled
+def timer(stage, **fields):
+    if not ENABLED:
+        return _NOOP
+    return _Timer(stage, fields)
+
+
+#decorator version of timer - returns the function untouched when disabled, so there is no per-call cost
+def timed(stage):
+    def wrap(fn):
+        if not ENABLED:
+            return fn
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with _Timer(stage, {}):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def count(name, n = 1):
+    if not ENABLED:
+        return
+    _records()
+    _local.counters[name] = _local.counters.get(name, 0) + n
+
+
+#start of a page rerun - clears this thread's stage records and counters
+def start_run():
+    if ENABLED:
+        _local.records = []
+        _local.counters = {}
+
+
+def run_timings():
+    '''Stage totals of the current rerun: {stage: (calls, total ms)} plus the counters'''
+    totals = {}
+    for r in _records():
+        calls, ms = totals.get(r['stage'], (0, 0.0))
+        totals[r['stage']] = (calls + 1, ms + r['ms'])
+    return totals, dict(_local.counters)
@@ -1,13 +1,27 @@
 #load packages
+import os
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from store import ShotStore
+from snapshot import Snapshot
+import query
+from cache import shared_cache
+from sketch import OutlierSketches
+from units import to_yards
+from schema import enforce_schema
+from bins import BIN_COLUMNS, sync_bin_codes
+from perf import timed, timer
 
 class Preprocessor:
-    def __init__(self, filename = 'master.csv'):
+    def __init__(self, filename = 'master.csv', columns = None, per_club_outliers = False, store = None, backend = None):
         self.path = Path(__file__).resolve().parent
         self.filename = filename
         self.file = self.path / self.filename
+        self.store = store if store is not None else ShotStore()
+        self.columns = columns #column projection, None = all columns
+        self.per_club_outliers = per_club_outliers #IQR fences per club instead of across all clubs
+        self.backend = (backend or query.BACKEND).lower() #'pandas' (in memory) or 'duckdb' (lazy scans of the store)
         self.raw_df = None
         self.clean_df = None
         self.outlier_filter = {
@@ -34,22 +48,39 @@ class Preprocessor:
         'Decent': None 
     }
 
+    @timed('preprocess.load_data')
     def load_data(self):
-        self.raw_df = pd.read_csv(self.file)
-        self.raw_df['Date'] = pd.to_datetime(self.raw_df['Date'])
-        self.raw_df['DistanceToPin_Yrds'] = self.raw_df['DistanceToPin_Yrds'].apply(lambda x: float(x.split(' ')[0]) if pd.notnull(x) else np.nan) #exclude "yrds" string
-        self.raw_df = self.raw_df.rename(columns = {'DistanceToPin_Yrds': 'DistanceToPin'})
+        #typed columnar store, only reads the projected columns
+        if self.store.exists():
+            self.raw_df = enforce_schema(self.store.read(columns=self.columns))
+            return self.raw_df
+
+        #legacy csv fallback (store not built yet - run store.py)
+        usecols = None
+        if self.columns is not None:
+            keep = set(['DistanceToPin_Yrds' if c == 'DistanceToPin' else c for c in self.columns])
+            usecols = lambda c: c in keep
+        self.raw_df = pd.read_csv(self.file, usecols=usecols)
+        if 'Date' in self.raw_df.columns:
+            self.raw_df['Date'] = pd.to_datetime(self.raw_df['Date'])
+        if 'DistanceToPin_Yrds' in self.raw_df.columns:
+            self.raw_df['DistanceToPin_Yrds'] = to_yards(self.raw_df['DistanceToPin_Yrds']) #exclude "yrds" string
+            self.raw_df = self.raw_df.rename(columns = {'DistanceToPin_Yrds': 'DistanceToPin'})
+        self.raw_df = enforce_schema(self.raw_df) #category club, float32 metrics
         return self.raw_df
     
-    def remove_outliers(self, col, strategy = 'lower'):
+    def remove_outliers(self, col, strategy = 'lower', lower = None, upper = None):
         if not np.issubdtype(col.dtype, np.number):
             return col  #skip cols non-numeric
-        #IQR method
-        q1 = np.percentile(col.dropna(), 25, method='midpoint') #exclude nans
-        q3 = np.percentile(col.dropna(), 75, method='midpoint') #exclude nans
-        IQR = q3 -q1  
-        upper = q3+1.5*IQR
-        lower = q1-1.5*IQR
+        if col.notna().sum() == 0:
+            return col  #nothing to fence (e.g. a metric missing from one session)
+        #IQR method - exact percentiles unless fences come in from the ingest sketches
+        if lower is None or upper is None:
+            q1 = np.percentile(col.dropna(), 25, method='midpoint') #exclude nans
+            q3 = np.percentile(col.dropna(), 75, method='midpoint') #exclude nans
+            IQR = q3 -q1  
+            upper = q3+1.5*IQR
+            lower = q1-1.5*IQR
 
         if strategy == 'lower':
             return col.where(col >= lower)
@@ -65,21 +96,98 @@ class Preprocessor:
             return col  #skip cols non-numeric
         return col.round(3)
     
+    #IQR fences from the quantile sketches kept up to date at ingest (None = no sketch, use exact)
+    def outlier_bounds(self, df, col, sketches):
+        if sketches is None:
+            return None, None
+        if self.per_club_outliers and 'Club' in df.columns:
+            clubs = df['Club'].astype(str)
+            fences = {club: sketches.bounds(col, club) for club in clubs.unique()}
+            lower = clubs.map({c: f[0] for c, f in fences.items()}).fillna(-np.inf).to_numpy()
+            upper = clubs.map({c: f[1] for c, f in fences.items()}).fillna(np.inf).to_numpy()
+            return lower, upper
+        lower, upper = sketches.bounds(col)
+        if np.isnan(lower) or np.isnan(upper):
+            return None, None
+        return lower, upper
+
+    @timed('preprocess.process_data')
     def process_data(self):
         if self.raw_df is None:
             self.load_data()
         df = self.raw_df.copy()
-        #loop thru numeric cols 
-        for col in df.select_dtypes(include='number').columns:
-            df[col] = self.remove_outliers(df[col], strategy=self.outlier_filter.get(col, None))
-            df[col] = self.round_vals(df[col]) #round vals with > dec. points
-        self.clean_df = df
+        if 'Date' in df.columns: #kept in date order for the searchsorted filter index (utils.ShotIndex)
+            df = df.sort_values('Date', kind='stable').reset_index(drop=True)
+        with timer('preprocess.outlier_sketches'):
+            #readers never write the sketches - the ingest saves them, unsaved segments are folded in memory
+            sketches = OutlierSketches(self.store).sync(save=False) if self.store.exists() else None
+        with timer('preprocess.clean_frame', rows=df.shape[0]):
+            self.clean_df = self.clean_frame(df, sketches)
         return self.clean_df
 
+    #outlier removal + rounding, also used by the rollup cube on newly ingested segments
+    def clean_frame(self, df, sketches = None):
+        #loop thru numeric cols (bin codes are synced from their cleaned source cols below)
+        for col in [c for c in df.select_dtypes(include='number').columns if c not in BIN_COLUMNS]:
+            strategy = self.outlier_filter.get(col, None)
+            lower, upper = self.outlier_bounds(df, col, sketches) if strategy is not None else (None, None)
+            df[col] = self.remove_outliers(df[col], strategy=strategy, lower=lower, upper=upper)
+            df[col] = self.round_vals(df[col]) #round vals with > dec. points
+        return sync_bin_codes(df)
+
+    #version of the data behind this preprocessor - changes whenever an ingest commits
+    def data_version(self):
+        source = self.store.manifest_file if self.store.manifest_file.exists() else self.file
+        st = os.stat(source)
+        return (str(source), st.st_mtime_ns, st.st_size)
+
+    #processed data is shared across reruns, pages and sessions until the store changes
+    @timed('preprocess.get_data')
     def get_data(self):
         if self.clean_df is None:
-            self.process_data()
+            columns = None if self.columns is None else tuple(self.columns)
+            key = (self.data_version(), columns, self.per_club_outliers)
+            self.clean_df = shared_cache.get_or_compute(key, self.shared_data)
         return self.clean_df
 
+    #shared query.LazyShots when the duckdb backend is on, else None (get_data always returns a DataFrame) -
+    #the lazy backend needs duckdb + the parquet store, per-club fences stay on pandas
+    @timed('preprocess.lazy')
+    def lazy(self):
+        if self.backend != 'duckdb' or not query.available() or self.per_club_outliers or not self.store.exists():
+            return None
+        columns = None if self.columns is None else tuple(self.columns)
+        return shared_cache.get_or_compute((self.data_version(), columns, 'lazy'), self.lazy_data)
+
+    #query.LazyShots over the store - cleaning happens in the scan, nothing is loaded up front
+    def lazy_data(self):
+        sketches = OutlierSketches(self.store).sync(save=False)
+        fences = {}
+        for col, strategy in self.outlier_filter.items():
+            if strategy is not None:
+                lower, upper = self.outlier_bounds(None, col, sketches)
+                if lower is not None:
+                    fences[col] = (lower, upper)
+        return query.LazyShots(self.store, self.outlier_filter, fences, columns=self.columns)
+
+    #memory-mapped snapshot shared by every process when it matches the store, else processed here (never written -
+    #the ingest publishes it once per commit, see publish_snapshot)
+    @timed('preprocess.shared_data')
+    def shared_data(self):
+        if self.per_club_outliers or not self.store.exists():
+            return self.process_data()
+        df = Snapshot(self.store).load(self.store.version(), columns=self.columns)
+        if df is not None:
+            return df
+        return self.process_data()
+
+    #process the committed store and publish it as the snapshot every reader maps - called by the ingest only
+    @timed('preprocess.publish_snapshot')
+    def publish_snapshot(self):
+        version = self.store.version()
+        df = self.process_data()
+        Snapshot(self.store).publish(df, version)
+        return df
+
         
 
@@ -0,0 +1,151 @@
+#load packages
+import os
+import pandas as pd
+from schema import enforce_schema
+from bins import BIN_SCHEMES, BIN_COLUMNS
+
+#optional out-of-core backend - pages fall back to in-memory pandas when duckdb is not installed
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+#SIMSHOT_BACKEND=duckdb turns it on, SIMSHOT_DUCKDB_MEMORY (e.g. '2GB') bounds the scan memory
+BACKEND = os.environ.get('SIMSHOT_BACKEND', 'pandas').lower()
+DUCKDB_MEMORY = os.environ.get('SIMSHOT_DUCKDB_MEMORY')
+AGG_FUNCS = {'mean': 'avg', 'count': 'count', 'sum': 'sum', 'min': 'min', 'max': 'max', 'std': 'stddev_samp'}
+
+
+def available():
+    return duckdb is not None
+
+
+def _q(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class LazyShots:
+    '''
+    Lazy view of the cleaned shot table over the parquet store (DuckDB).
+    Outlier fences, rounding and bin codes are applied inside the scan exactly like Preprocessor.clean_frame,
+    date ranges prune partitions via the manifest and club / date predicates and group-bys run in the
+    scan on all cores, so only the result is materialized. Drop-in for the DataFrame behind
+    filter_data - column access (data['Club']) reads just that column.
+    '''
+    def __init__(self, store, outlier_filter, fences, columns = None):
+        self.store = store
+        self.conn = duckdb.connect()
+        if DUCKDB_MEMORY:
+            self.conn.execute(f"SET memory_limit = '{DUCKDB_MEMORY}'")
+        names = store.columns()
+        if columns is not None: #bin codes follow their source column
+            columns = set(columns) | set(c for c in BIN_COLUMNS if BIN_SCHEMES[c][0] in columns)
+        self.columns = pd.Index([c for c in names if columns is None or c in columns])
+        self.exprs = self._clean_exprs(names, outlier_filter, fences)
+
+    #sql for each cleaned column - fence, round to 3 decimals, bin codes from the cleaned source value
+    def _clean_exprs(self, names, outlier_filter, fences):
+        exprs = {}
+        for col in names:
+            if col in ('Date', 'Club') or col in BIN_COLUMNS:
+                continue
+            value = _q(col)
+            lower, upper = fences.get(col, (None, None))
+            strategy = outlier_filter.get(col)
+            if strategy is not None and lower is not None and upper is not None:
+                lower, upper = float(lower), float(upper)
+                keep = {'lower': f"{value} >= {lower!r}", 'upper': f"{value} <= {upper!r}",
+                        'both': f"{value} >= {lower!r} AND {value} <= {upper!r}"}[strategy]
+                value = f"CASE WHEN {keep} THEN {value} END"
+            #float32 half-even rounding, same arithmetic as Series.round(3) on the float32 columns
+            exprs[col] = f"round_even(CAST({value} AS REAL) * CAST(1000 AS REAL), 0) / CAST(1000 AS REAL)"
+        exprs['Date'] = _q('Date')
+        exprs['Club'] = f"CAST({_q('Club')} AS VARCHAR)"
+        for name, (source, edges, _) in BIN_SCHEMES.items():
+            if source not in exprs:
+                continue
+            v = f"({exprs[source]})"
+            cases = ' '.join(f"WHEN {v} < CAST({hi!r} AS REAL) THEN {i}" for i, hi in enumerate(edges[1:]))
+            exprs[name] = f"CAST(CASE WHEN {v} IS NULL OR {v} < CAST({edges[0]!r} AS REAL) THEN -1 {cases} ELSE -1 END AS TINYINT)"
+        return exprs
+
+    #FROM clause + its bound parameter (the manifest's files in the range), None when there are none
+    def _source(self, date_range):
+        files = [str(f) for f in self.store.files(date_range)]
+        if len(files) == 0:
+            return None, []
+        return "read_parquet(?, union_by_name = true, file_row_number = true)", [files]
+
+    def _where(self, date_range, clubs):
+        clauses, params = [], []
+        if date_range is not None:
+            clauses.append(f"{_q('Date')} BETWEEN ? AND ?")
+            params += [pd.to_datetime(date_range[0]).to_pydatetime(), pd.to_datetime(date_range[1]).to_pydatetime()]
+        if clubs is not None:
+            clubs = list(dict.fromkeys(str(c) for c in clubs))
+            clauses.append(f"CAST({_q('Club')} AS VARCHAR) IN ({', '.join('?' for _ in clubs)})")
+            params += clubs
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def _run(self, sql, params):
+        return self.conn.cursor().execute(sql, params).df() #cursor per query, safe across session threads
+
+    def filter(self, date_range, clubs = None, columns = None):
+        '''Cleaned rows in the date range (and clubs), in date order - the only rows materialized'''
+        columns = list(self.columns) if columns is None else [c for c in self.columns if c in columns]
+        source, params = self._source(date_range)
+        if source is None:
+            return enforce_schema(pd.DataFrame(columns=columns))
+        where, where_params = self._where(date_range, clubs)
+        select = ', '.join(f"{self.exprs[c]} AS {_q(c)}" for c in columns)
+        df = self._run(f"SELECT {select} FROM {source}{where} ORDER BY {_q('Date')}, file_row_number", params + where_params)
+        return enforce_schema(df)
+
+    def aggregate(self, by, date_range = None, clubs = None, **aggs):
+        '''
+        Group-by pushed into the scan - aggs like pandas named aggregation, e.g.
+        aggregate(['Club'], AoA=('AoA', 'mean'), Count=('AoA', 'count'))
+        '''
+        by = [by] if isinstance(by, str) else list(by)
+        source, params = self._source(date_range)
+        if source is None:
+            return pd.DataFrame(columns=by + list(aggs))
+        where, where_params = self._where(date_range, clubs)
+        keys = ', '.join(f"{self.exprs[c]} AS {_q(c)}" for c in by)
+        values = ', '.join(f"{AGG_FUNCS[func]}({self.exprs[col]}) AS {_q(name)}" for name, (col, func) in aggs.items())
+        group = ', '.join(str(i + 1) for i in range(len(by)))
+        return self._run(f"SELECT {keys}, {values} FROM {source}{where} GROUP BY {group} ORDER BY {group}", params + where_params)
+
+    #distinct non-null values of a column in order of first appearance (page options like the club list)
+    def distinct(self, col):
+        source, params = self._source(None)
+        if source is None:
+            return []
+        df = self._run(f"SELECT {self.exprs[col]} AS v FROM {source} WHERE v IS NOT NULL GROUP BY 1 "
+                       f"ORDER BY min({_q('Date')})", params)
+        return df['v'].tolist()
+
+    #(min, max) of a column in one aggregate pass - date bounds for the sidebar
+    def min_max(self, col):
+        source, params = self._source(None)
+        if source is None:
+            return None, None
+        df = self._run(f"SELECT min({self.exprs[col]}) AS lo, max({self.exprs[col]}) AS hi FROM {source}", params)
+        lo, hi = df.iloc[0]
+        if col == 'Date':
+            lo, hi = pd.Timestamp(lo), pd.Timestamp(hi)
+        return lo, hi
+
+    #full column access (kept for callers that need every value) - one projected, date-ordered scan
+    def __getitem__(self, col):
+        source, params = self._source(None)
+        if source is None:
+            return pd.Series([], name=col, dtype=object)
+        df = self._run(f"SELECT {self.exprs[col]} AS {_q(col)} FROM {source} ORDER BY {_q('Date')}, file_row_number", params)
+        return enforce_schema(df)[col]
+
+    @property
+    def shape(self):
+        source, params = self._source(None)
+        rows = 0 if source is None else int(self._run(f"SELECT count(*) AS n FROM {source}", params).iloc[0, 0])
+        return (rows, len(self.columns))
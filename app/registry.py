@@ -0,0 +1,151 @@
+#load packages
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import joblib
+import numpy as np
+import pandas as pd
+from store import atomic_write_json
+from perf import timed
+
+#disk bound from SIMSHOT_MODEL_MB (default 512 MB), entries unused for SIMSHOT_MODEL_DAYS (default 30) are dropped
+MODEL_MAX_BYTES = int(float(os.environ.get('SIMSHOT_MODEL_MB', 512)) * 1024 * 1024)
+MODEL_MAX_AGE_DAYS = float(os.environ.get('SIMSHOT_MODEL_DAYS', 30))
+
+
+#entry -> last get() in this process, not yet saved to its meta.json
+_last_used = {}
+
+
+#stable hash of the training inputs (store content hash, target, club group, excluded cols, ...)
+def key_hash(key):
+    return hashlib.sha1(json.dumps(key, default=str).encode()).hexdigest()[:16]
+
+
+class ModelRegistry:
+    '''
+    On-disk registry of tuned random forests, next to the store they were trained on
+        shot_store/_models/<key hash>/model.joblib      <- tuned estimator
+        shot_store/_models/<key hash>/importance.parquet
+        shot_store/_models/<key hash>/shap.npy
+        shot_store/_models/<key hash>/meta.json         <- key, metrics, features, created/used, bytes (+ extra, e.g. lineage)
+    Entries are written to a temp dir and renamed into place, so readers never see a partial entry.
+    Metrics, importances and SHAP arrays load without unpickling the forest (load_model does that).
+    Least recently used entries are evicted past max_bytes, and any entry unused for max_age_days.
+    Reads never write - uses are remembered in-process and saved to meta.json by the next put.
+    '''
+    def __init__(self, store, max_bytes = MODEL_MAX_BYTES, max_age_days = MODEL_MAX_AGE_DAYS):
+        self.store = store
+        self.root = store.root / '_models'
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 24 * 3600
+
+    def path(self, key):
+        return self.root / key_hash(key)
+
+    def meta(self, key):
+        meta_file = self.path(key) / 'meta.json'
+        if not meta_file.exists():
+            return None
+        with open(meta_file, 'r') as f:
+            return json.load(f)
+
+    @timed('registry.get')
+    def get(self, key):
+        '''Stored results for the key - {metrics, features, importance, shap, meta} - or None'''
+        meta = self.meta(key)
+        if meta is None:
+            return None
+        entry = self.path(key)
+        try:
+            importance = pd.read_parquet(entry / 'importance.parquet')
+            shap_vals = np.load(entry / 'shap.npy', mmap_mode='r') #read-only, paged in on use
+        except FileNotFoundError: #evicted by another process mid-read
+            return None
+        _last_used[str(entry)] = time.time()
+        return {'metrics': meta['metrics'], 'features': meta['features'], 'importance': importance, 'shap': shap_vals, 'meta': meta}
+
+    #unpickle the tuned estimator (only needed to predict or keep training)
+    @timed('registry.load_model')
+    def load_model(self, key):
+        try:
+            return joblib.load(self.path(key) / 'model.joblib')
+        except FileNotFoundError:
+            return None
+
+    @timed('registry.put')
+    def put(self, key, model, metrics, importance, shap_vals, features = None, extra = None):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{key_hash(key)}.{uuid.uuid4().hex}.tmp"
+        tmp.mkdir()
+        joblib.dump(model, tmp / 'model.joblib')
+        importance.to_parquet(tmp / 'importance.parquet', index=False)
+        np.save(tmp / 'shap.npy', np.asarray(shap_vals))
+        size = sum(f.stat().st_size for f in tmp.iterdir())
+        now = time.time()
+        #a missing metric (no OOB score after a warm-start update) is stored as null - bare NaN is not valid json
+        metrics = {k: float(v) if np.isfinite(v) else None for k, v in metrics.items()}
+        meta = {'key': key, 'metrics': metrics, 'features': list(features or []),
+                'created': now, 'last_used': now, 'bytes': size, **(extra or {})}
+        atomic_write_json(tmp / 'meta.json', meta)
+
+        dest = self.path(key)
+        shutil.rmtree(dest, ignore_errors=True) #refit of the same inputs replaces the entry
+        try:
+            os.replace(tmp, dest)
+        except OSError: #another session stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+        return dest
+
+    #save the uses get() remembered into each entry's last_used (writer side, before evicting)
+    def flush_uses(self):
+        for entry, meta in self.entries():
+            used = _last_used.pop(str(entry), None)
+            if used is None or used <= meta['last_used'] or not entry.exists(): #gone - evicted by another process
+                continue
+            meta['last_used'] = used
+            atomic_write_json(entry / 'meta.json', meta)
+
+    #newest entry stored with this lineage (same training inputs apart from the data), for incremental updates -
+    #with through, only models trained on shots up to that time (never one that already saw later shots)
+    def latest(self, lineage, through = None):
+        found = [meta for _, meta in self.entries() if meta.get('lineage') == lineage
+                 and (through is None or pd.to_datetime(meta['trained_through']) <= pd.to_datetime(through))]
+        return max(found, key=lambda m: m['created']) if found else None
+
+    def entries(self):
+        found = []
+        if not self.root.exists():
+            return found
+        for entry in self.root.iterdir():
+            meta_file = entry / 'meta.json'
+            if entry.name.startswith('.') or not meta_file.exists():
+                continue
+            try:
+                with open(meta_file, 'r') as f:
+                    found.append((entry, json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return found
+
+    def evict(self):
+        '''Drop entries unused for max_age, then least recently used ones until under max_bytes'''
+        self.flush_uses()
+        now = time.time()
+        entries = sorted(self.entries(), key=lambda e: e[1]['last_used'])
+        total = sum(meta['bytes'] for _, meta in entries)
+        removed = 0
+        for i, (entry, meta) in enumerate(entries):
+            newest = i == len(entries) - 1 #always keep the entry just written
+            if not newest and (now - meta['last_used'] > self.max_age or total > self.max_bytes):
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= meta['bytes']
+                removed += 1
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
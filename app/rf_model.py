@@ -2,12 +2,13 @@
 import pandas as pd
 import numpy as np
 import datetime
-import shap 
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.impute import SimpleImputer
-from sklearn.model_selection import train_test_split, GridSearchCV, RandomizedSearchCV
+from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.metrics import mean_squared_error, r2_score
-from process import Preprocessor
+from bins import BIN_COLUMNS
+from search import SuccessiveHalving
+from explain import ShapEngine, SHAP_MODE, SHAP_ROWS_PER_CLUB
+from perf import timed
 
 
 
@@ -23,9 +24,9 @@ class RunRandomForest():
 
         if exclude_cols is None:
             self.exclude_cols = default
-        # else:
-        #     self.exclude_cols = list(set(exclude_cols + default))
-        self.X = self.data.drop(columns=self.exclude_cols)#drop response and date var
+        else:
+            self.exclude_cols = list(set(exclude_cols + default))
+        self.X = self.data.drop(columns=self.exclude_cols + BIN_COLUMNS, errors='ignore')#drop response and date var (+ bin codes derived from carry)
         self.y = self.data[target].values 
 
         #Drop rows with NaNs in any feature
@@ -35,24 +36,43 @@ class RunRandomForest():
         self.y = tmp['target'].values
         self.X = tmp.drop(columns=['target'])
         assert np.issubdtype(self.y.dtype, np.number), "Y must be numeric"
-    
+
+    @timed('rf.onehotencode')
     def onehotencode(self):
         ''' One hot encodes categorical columns of X. Modifies X in place. Does not return anything'''
 
         self.X = self.X.copy()
-        self.x_cat = self.X.select_dtypes(include=['object']).columns
+        self.x_cat = self.X.select_dtypes(include=['object', 'category', 'string']).columns
         if len(self.x_cat) > 0:
             self.X = pd.get_dummies(data=self.X, columns= self.x_cat)
         else:
             self.X = self.X
-        
-  
+
+    @timed('rf.split_data')
     def split_data(self, size = 0.3):
-        self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(self.X, self.y, test_size= size, random_state=42)
+        '''Hashed holdout when shots carry Date + Club (a shot stays on the same side after every ingest), else random'''
+        if 'Date' not in self.data.columns or 'Club' not in self.data.columns:
+            self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(self.X, self.y, test_size= size, random_state=42)
+            return self.X_train, self.X_test, self.y_train, self.y_test
+        test = self.holdout_mask(size)
+        self.X_train, self.X_test = self.X[~test], self.X[test]
+        self.y_train, self.y_test = self.y[~test], self.y[test]
         return self.X_train, self.X_test, self.y_train, self.y_test
-    
 
-    def fit(self, cv, log_cv = False): 
+    #stable row id (shot time, club, order within them) hashed into [0, 1) - test rows are those below size
+    def holdout_mask(self, size):
+        ids = self.data.loc[self.X.index, ['Date', 'Club']].astype({'Club': str})
+        ids['n'] = ids.groupby(['Date', 'Club'], sort=False).cumcount()
+        h = pd.util.hash_pandas_object(ids, index=False).to_numpy()
+        return (h % 10_000) < size * 10_000
+
+    @timed('rf.fit')
+    def fit(self, cv, log_cv = False, search = 'grid', time_budget = None, max_fits = None, progress = None): 
+        '''
+        search='grid' - exhaustive GridSearchCV (cv folds per config)
+        search='halving' - search.SuccessiveHalving on OOB R^2 with rows + trees as the resource, optionally
+        capped by time_budget (seconds) / max_fits and reporting each fit to progress; cv is not used
+        '''
         base_rf = RandomForestRegressor(oob_score=True, random_state=42)
         self.param_grid = {
             'n_estimators': [50, 100],                   
@@ -63,6 +83,17 @@ class RunRandomForest():
             'bootstrap': [True]                      
         }
 
+        if search == 'halving':
+            self.search = SuccessiveHalving(self.param_grid, time_budget=time_budget, max_fits=max_fits, random_state=42)
+            self.search.fit(self.X_train, self.y_train, progress=progress)
+            if log_cv:
+                print(f"Search stopped: {self.search.stopped_} after {self.search.n_fits_} fits, {len(self.search.pruned_)} configs pruned")
+                print("Search Results:", self.search.report().head())
+            self.tuned_rf = self.search.best_estimator_
+            print(self.tuned_rf)
+            self.y_pred =  self.tuned_rf.predict(self.X_test)
+            return self.tuned_rf
+
         self.grid_search = GridSearchCV(base_rf, param_grid=self.param_grid,scoring='neg_mean_squared_error', cv= cv, n_jobs=-1)
         self.grid_search.fit(self.X_train, self.y_train)
         if log_cv:
@@ -75,40 +106,87 @@ class RunRandomForest():
         print(self.tuned_rf)
         self.y_pred =  self.tuned_rf.predict(self.X_test)
         return self.tuned_rf
-    
-    
+
+    @timed('rf.update')
+    def update(self, model, trained_through, baseline_mse, drift_tol = 0.15, max_trees = None, min_new_rows = 30, cv = 5, progress = None):
+        '''
+        Incremental refresh of a previously tuned forest instead of a new search. Its hyperparameters are kept and
+        warm start adds trees fit on the training rows dated after trained_through (in proportion to their share
+        of the training set); past max_trees the oldest trees are dropped (rolling window). Falls back to a full
+        halving search when the features changed or the holdout MSE drifts past baseline_mse * (1 + drift_tol).
+        Call after split_data. Returns 'current' (no new rows), 'updated' or 'retuned'.
+        '''
+        features = list(getattr(model, 'feature_names_in_', []))
+        if len(features) == 0 or len(set(self.X.columns) - set(features)) > 0: #new club / feature the forest never saw
+            self.fit(cv, search='halving', progress=progress)
+            return 'retuned'
+        #same column order as the forest, one-hot columns missing from this selection are all zero
+        self.X, self.X_train, self.X_test = [x.reindex(columns=features, fill_value=0) for x in (self.X, self.X_train, self.X_test)]
+
+        dates = pd.to_datetime(self.data.loc[self.X_train.index, 'Date'])
+        new = (dates > pd.to_datetime(trained_through)).to_numpy()
+        status = 'current'
+        if new.sum() >= min_new_rows:
+            n_new = max(10, int(round(model.n_estimators * new.sum() / len(new))))
+            #OOB votes of trees fit on earlier data are meaningless on the new rows - scored on the holdout instead
+            model.set_params(warm_start=True, oob_score=False, n_estimators=len(model.estimators_) + n_new)
+            model.fit(self.X_train[new], self.y_train[new])
+            if max_trees is not None and len(model.estimators_) > max_trees: #rolling window - oldest trees out
+                model.estimators_ = model.estimators_[-max_trees:]
+            model.set_params(warm_start=False, n_estimators=len(model.estimators_)) #plain fitted forest again
+            for attr in ('oob_score_', 'oob_prediction_'):
+                if hasattr(model, attr):
+                    delattr(model, attr)
+            status = 'updated'
+
+        self.tuned_rf = model
+        self.y_pred = self.tuned_rf.predict(self.X_test)
+        if mean_squared_error(self.y_test, self.y_pred) > baseline_mse * (1 + drift_tol):
+            self.fit(cv, search='halving', progress=progress)
+            return 'retuned'
+        return status
+
+    @timed('rf.evaluate')
     def evaluate(self):
         if not hasattr(self, 'tuned_rf'):
             raise AttributeError("Model has not been fit. Call fit_tune() first.")
 
         model = self.tuned_rf
-        self.oob = model.oob_score_
+        self.oob = getattr(model, 'oob_score_', np.nan) #no OOB estimate after a warm-start update
         self.mse = mean_squared_error(self.y_test, self.y_pred)
         self.r2 = r2_score(self.y_test, self.y_pred)
         return self.oob, self.mse, self.r2
-    
+
+    @timed('rf.feature_importance')
     def feature_importance(self, top_n: int = 10):
         imp_model = getattr(self, 'tuned_rf', getattr(self, 'rf', None))
         if imp_model is None or not hasattr(imp_model, 'feature_importances_'):
             raise AttributeError("Model must be fit or tuned before checking feature importances.")
-        
+
         imp = imp_model.feature_importances_
         x_names = self.X.columns  # Already one-hot encoded
         feat_df = pd.DataFrame({'Feature': x_names, 'Importance': imp})
         feat_df = feat_df.sort_values(by='Importance', ascending=False)
-    
+
         return feat_df.head(top_n)
-    
-    def shap_values(self):
+
+    @timed('rf.shap_values')
+    def shap_values(self, mode = None, per_club = None):
+        '''
+        SHAP values of up to per_club test rows per club (explain.ShapEngine, approx / exact mode, cached per model).
+        The explained rows are left in self.shap_rows (X_test index labels).
+        '''
         if not hasattr(self, 'tuned_rf'):
             raise ValueError("Model has not been tuned yet. Call .tune() first.")
-        explainer = shap.TreeExplainer(self.tuned_rf)
-        shap_values = explainer.shap_values(self.X_test)
-        return shap_values#, shap.summary_plot(shap_values, self.X_test)
+        engine = ShapEngine(mode=mode or SHAP_MODE, per_club=SHAP_ROWS_PER_CLUB if per_club is None else per_club)
+        clubs = self.data.loc[self.X_test.index, 'Club'] if 'Club' in self.data.columns else None
+        shap_values, self.shap_rows = engine.explain(self.tuned_rf, self.X_test, clubs=clubs)
+        return shap_values#, shap.summary_plot(shap_values, self.X_test.loc[self.shap_rows])
 
 
 
 ###### PERFORM RANDOM FOREST REGRESSION ########
+# from process import Preprocessor
 # data = Preprocessor().get_data() #load data 
 # target = 'Carry'
 
@@ -140,4 +218,3 @@ class RunRandomForest():
 
 
 
-        
\ No newline at end of file
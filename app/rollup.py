@@ -0,0 +1,193 @@
+#load packages
+import json
+import os
+import uuid
+import numpy as np
+import pandas as pd
+from store import atomic_write_json, player_store
+from schema import enforce_schema
+from sketch import OutlierSketches
+from cache import shared_cache
+from process import Preprocessor
+from bins import BIN_COLUMNS
+from perf import timed
+
+KEYS = ['Date', 'Club', 'metric']
+
+
+#partial aggregates per (session, club, metric) from a cleaned shot frame
+def aggregate(df):
+    metrics = [c for c in df.select_dtypes(include='number').columns if c not in BIN_COLUMNS]
+    if len(metrics) == 0 or df.shape[0] == 0:
+        return pd.DataFrame(columns=KEYS + ['count', 'sum', 'sumsq', 'min', 'max'])
+    long = df[['Date', 'Club'] + metrics].melt(id_vars=['Date', 'Club'], var_name='metric', value_name='value')
+    long = long.dropna(subset=['value'])
+    long['Club'] = long['Club'].astype(str)
+    long['value'] = long['value'].astype(np.float64)
+    long['sq'] = long['value'] ** 2
+    return (long.groupby(KEYS, observed=True, dropna=False) #shots without a club still count under 'All'
+            .agg(count=('value', 'count'), sum=('value', 'sum'), sumsq=('sq', 'sum'), min=('value', 'min'), max=('value', 'max'))
+            .reset_index())
+
+
+#merge partial aggregates - counts/sums add, min/max combine
+def combine(parts):
+    parts = [p for p in parts if p.shape[0] > 0]
+    if len(parts) == 0:
+        return aggregate(pd.DataFrame())
+    cube = pd.concat(parts, ignore_index=True)
+    return (cube.groupby(KEYS, observed=True, dropna=False)
+            .agg({'count': 'sum', 'sum': 'sum', 'sumsq': 'sum', 'min': 'min', 'max': 'max'})
+            .reset_index())
+
+
+#exact count/mean/std/min/max from partial aggregates (std with ddof=1 like pandas)
+def summarize(rows):
+    n = rows['count'].sum()
+    if n == 0:
+        return {'count': 0, 'mean': np.nan, 'std': np.nan, 'min': np.nan, 'max': np.nan}
+    total = rows['sum'].sum()
+    mean = total / n
+    var = (rows['sumsq'].sum() - total * mean) / (n - 1) if n > 1 else np.nan
+    return {'count': int(n), 'mean': mean, 'std': np.sqrt(max(var, 0.0)) if n > 1 else np.nan,
+            'min': rows['min'].min(), 'max': rows['max'].max()}
+
+
+class RollupCube:
+    '''
+    Pre-aggregated (session date, club, metric) -> count, sum, sum of squares, min, max over
+    the outlier-cleaned shots, kept in shot_store/_rollup.parquet.
+    sync() aggregates only segments committed since the last sync. The cube is rebuilt when
+    segments were replaced or any IQR fence changed, so it always matches what Preprocessor returns. Only the ingest saves (sync());
+    pages call sync(save=False) and catch up in memory, so readers never write the store.
+    '''
+    def __init__(self, store):
+        self.store = store
+        self.file = store.root / '_rollup.parquet'
+        self.state_file = store.root / '_rollup.json'
+        self.cube = None
+
+    def load_state(self):
+        if self.state_file.exists() and self.file.exists():
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        return {'segments': [], 'fences': {}}
+
+    def current_fences(self, preprocessor, sketches):
+        fences = {}
+        for col, strategy in preprocessor.outlier_filter.items():
+            if strategy is not None and col in sketches.sketches:
+                lower, upper = sketches.bounds(col)
+                if not (np.isnan(lower) or np.isnan(upper)): #no values yet - nothing is fenced
+                    fences[col] = [lower, upper]
+        return fences
+
+    #any moved fence changes which shots every partial kept (json round trips the floats exactly)
+    def drifted(self, old, new):
+        return {col: list(f) for col, f in old.items()} != {col: list(f) for col, f in new.items()}
+
+    @timed('rollup.sync')
+    def sync(self, save = True):
+        preprocessor = Preprocessor(store=self.store)
+        sketches = OutlierSketches(self.store).sync(save=save)
+        fences = self.current_fences(preprocessor, sketches)
+        state = self.load_state()
+        current = [seg['file'] for seg in self.store.manifest()['segments']]
+        included = set(state['segments'])
+
+        rebuild = len(included - set(current)) > 0 or self.drifted(state['fences'], fences)
+        new = current if rebuild else [f for f in current if f not in included]
+        if len(new) == 0:
+            return self
+
+        #one segment at a time keeps a rebuild's memory bounded by the largest segment
+        parts = [] if rebuild else [pd.read_parquet(self.file)]
+        for f in new:
+            raw = enforce_schema(self.store.read_files([self.store.root / f]))
+            parts.append(aggregate(preprocessor.clean_frame(raw, sketches)))
+        self.cube = combine(parts)
+        if not save:
+            return self
+
+        tmp = self.file.parent / f".{self.file.name}.{uuid.uuid4().hex}.tmp"
+        self.cube.to_parquet(tmp, index=False)
+        os.replace(tmp, self.file)
+        atomic_write_json(self.state_file, {'segments': current, 'fences': fences})
+        return self
+
+    def load(self):
+        if self.cube is None:
+            self.cube = pd.read_parquet(self.file) if self.file.exists() else aggregate(pd.DataFrame())
+        return self.cube
+
+
+#cube rows for a date range / club selection (same semantics as utils.filter_data)
+def select(cube, date_range, selected_club, metric = None):
+    mask = cube['Date'].between(pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1]))
+    if metric is not None:
+        mask &= cube['metric'] == metric
+    if isinstance(selected_club, list):
+        if not ('All' in selected_club and len(selected_club) == 1):
+            mask &= cube['Club'].isin([str(c) for c in selected_club])
+    elif selected_club != 'All':
+        mask &= cube['Club'] == str(selected_club)
+    return cube[mask]
+
+
+def metric_summary(cube, date_range, selected_club, metric):
+    return summarize(select(cube, date_range, selected_club, metric))
+
+
+#per (session, club) mean of a metric - the trend chart series
+def session_means(cube, date_range, selected_club, metric):
+    rows = select(cube, date_range, selected_club, metric)
+    out = rows[['Date', 'Club']].copy()
+    out[metric] = rows['sum'] / rows['count']
+    return out.sort_values(['Date', 'Club']).reset_index(drop=True)
+
+
+#per club mean + count of a metric over the date range
+def club_means(cube, date_range, metric):
+    rows = select(cube, date_range, 'All', metric)
+    grouped = rows.groupby('Club', observed=True).agg(total=('sum', 'sum'), Count=('count', 'sum')).reset_index()
+    grouped[metric] = grouped['total'] / grouped['Count']
+    return grouped[['Club', metric, 'Count']]
+
+
+@timed('rollup.get_rollup')
+def get_rollup(preprocessor):
+    '''
+    Cube for the current data version - read from the store (segments the ingest has not folded in
+    yet are aggregated in memory, nothing is written) and shared through the process cache.
+    Without a store it is aggregated from the processed frame in memory.
+    '''
+    def build():
+        if preprocessor.store.exists():
+            return RollupCube(preprocessor.store).sync(save=False).load()
+        return aggregate(preprocessor.get_data())
+    return shared_cache.get_or_compute((preprocessor.data_version(), 'rollup'), build)
+
+
+#clubs any of the players hit, in order of first use - the leaderboard's club filter options
+def clubs(players):
+    cubes = [get_rollup(Preprocessor(store=player_store(player))) for player in players]
+    rows = pd.concat([cube[['Date', 'Club']] for cube in cubes], ignore_index=True)
+    first = rows.dropna().groupby('Club', observed=True)['Date'].min().sort_values(kind='stable')
+    return list(first.index)
+
+
+def leaderboard(players, date_range, selected_club, metrics):
+    '''
+    One row per player - shot count and the mean of each metric, combined from that player's
+    rollup cube only, so the board never loads anyone's shots.
+    '''
+    rows = []
+    for player in players:
+        cube = get_rollup(Preprocessor(store=player_store(player)))
+        row = {'Player': player}
+        for metric in metrics:
+            summary = metric_summary(cube, date_range, selected_club, metric)
+            row.setdefault('Shots', summary['count'])
+            row[metric] = summary['mean']
+        rows.append(row)
+    return pd.DataFrame(rows, columns=['Player', 'Shots'] + list(metrics))
@@ -0,0 +1,72 @@
+#load packages
+import pandas as pd
+
+#declared in-memory schema of the shot table
+#float32 keeps ~7 significant digits - plenty for launch monitor readings (spin in rpm, distances to 0.01 yd)
+SHOT_SCHEMA = {
+    'Date': 'datetime64[ns]',
+    'Club': 'category',
+    'Carry': 'float32',
+    'TotalDistance': 'float32',
+    'BallSpeed': 'float32',
+    'BackSpin': 'float32',
+    'SideSpin': 'float32',
+    'HLA': 'float32',
+    'VLA': 'float32',
+    'Decent': 'float32',
+    'PeakHeight': 'float32',
+    'Offline': 'float32',
+    'rawSpinAxis': 'float32',
+    'rawCarryGame': 'float32',
+    'ClubSpeed': 'float32',
+    'Path': 'float32',
+    'AoA': 'float32',
+    'FaceToTarget': 'float32',
+    'FaceToPath': 'float32',
+    'SmashFactor': 'float32',
+    'DistanceToPin': 'float32',
+    'CarryBin': 'int8', #bin codes from bins.BIN_SCHEMES, -1 = no bin
+    'SmashBin': 'int8',
+}
+
+
+def enforce_schema(df):
+    '''
+    Cast a shot frame to SHOT_SCHEMA - drops stray index cols ('Unnamed: 0'),
+    columns not in the schema that are numeric become float32 as well
+    '''
+    df = df.drop(columns=[c for c in df.columns if str(c).startswith('Unnamed')])
+    out = {}
+    for col in df.columns:
+        dtype = SHOT_SCHEMA.get(col)
+        if dtype is None and pd.api.types.is_numeric_dtype(df[col]):
+            dtype = 'float32'
+        if dtype is None:
+            out[col] = df[col]
+        elif dtype == 'category':
+            out[col] = df[col].astype('category') if df[col].dtype != 'category' else df[col]
+        elif dtype.startswith('int'): #codes missing from older segments -> -1 (repaired by bins.sync_bin_codes)
+            out[col] = pd.to_numeric(df[col], errors='coerce').fillna(-1).astype(dtype)
+        elif dtype.startswith('datetime'):
+            out[col] = pd.to_datetime(df[col]).astype(dtype)
+        else:
+            out[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+    return pd.DataFrame(out, index=df.index)
+
+
+def memory_footprint(df):
+    '''Bytes per column plus total, deep (includes category labels / strings)'''
+    usage = df.memory_usage(deep=True, index=True)
+    return {'total_bytes': int(usage.sum()), 'rows': int(df.shape[0]),
+            'columns': {str(c): int(b) for c, b in usage.items()}}
+
+
+if __name__ == '__main__':
+    #report the footprint of the loaded dataset before / after the schema
+    from process import Preprocessor
+    p = Preprocessor()
+    raw = p.load_data()
+    wide = raw.astype({c: 'float64' for c in raw.select_dtypes(include='number').columns}).astype({'Club': object})
+    before = memory_footprint(wide)['total_bytes']
+    after = memory_footprint(p.get_data())['total_bytes']
+    print(f"float64/object: {before / 1e6:.2f} MB, typed schema: {after / 1e6:.2f} MB ({before / max(after, 1):.1f}x smaller)")
@@ -0,0 +1,133 @@
+#load packages
+import math
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import ParameterGrid
+
+
+class SuccessiveHalving:
+    '''
+    Successive halving over a random forest grid with training rows and trees as the resource.
+    n_estimators leaves the grid and becomes the resource - every config starts on a small
+    sample with few trees, is scored by its OOB R^2 (one fit, no CV folds) and only the best
+    1/eta move up to eta times the rows and trees. The last rung trains on every row with
+    max_trees, so the winner there is the tuned model.
+    Stops early on time_budget (seconds), max_fits, or when the best score improves by less
+    than tol from one rung to the next; the leader is then refit at full resource.
+    Every fit is kept in results_, configs dropped along the way in pruned_.
+    '''
+    def __init__(self, param_grid, eta = 3, min_rows = 200, min_trees = 20, max_trees = None,
+                 time_budget = None, max_fits = None, tol = 1e-3, random_state = 42, n_jobs = -1):
+        grid = dict(param_grid)
+        trees = grid.pop('n_estimators', [100])
+        self.configs = list(ParameterGrid(grid))
+        self.eta = eta
+        self.min_rows = min_rows
+        self.min_trees = min_trees
+        self.max_trees = max_trees or max(trees)
+        self.time_budget = time_budget
+        self.max_fits = max_fits
+        self.tol = tol
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+
+    #rows / trees of each rung, geometric up to the full resource
+    def schedule(self, n_rows):
+        rungs = max(int(math.floor(math.log(len(self.configs), self.eta))), 0) + 1
+        out = []
+        for i in range(rungs):
+            frac = self.eta ** (i - rungs + 1)
+            out.append((min(n_rows, max(self.min_rows, int(n_rows * frac))), max(self.min_trees, int(round(self.max_trees * frac)))))
+        return out
+
+    def _fit_one(self, params, X, y, trees):
+        model = RandomForestRegressor(n_estimators=trees, oob_score=True, random_state=self.random_state,
+                                      n_jobs=self.n_jobs, **params)
+        with warnings.catch_warnings(): #small forests leave a few rows without OOB votes
+            warnings.simplefilter('ignore', UserWarning)
+            model.fit(X, y)
+        return model
+
+    def _out_of_budget(self, start):
+        if self.max_fits is not None and self.n_fits_ >= self.max_fits:
+            return 'fit_budget'
+        if self.time_budget is not None and time.perf_counter() - start >= self.time_budget:
+            return 'time_budget'
+        return None
+
+    #fits if nothing stops early - every rung's survivors at that rung
+    def planned_fits(self, n_rows):
+        alive, total = len(self.configs), 0
+        for _ in self.schedule(n_rows):
+            total += alive
+            alive = max(1, int(math.ceil(alive / self.eta)))
+        return total
+
+    def fit(self, X, y, progress = None):
+        '''progress(record, n_fits, planned, best) is called after every fit - raising from it aborts the search'''
+        start = time.perf_counter()
+        y = np.asarray(y)
+        order = np.random.default_rng(self.random_state).permutation(len(y)) #nested samples, rung i rows are a prefix
+        self.results_, self.pruned_ = [], []
+        self.n_fits_ = 0
+        self.stopped_ = 'completed'
+
+        alive = list(range(len(self.configs)))
+        best_prev = -np.inf
+        leader, leader_model, resource = 0, None, None
+        schedule = self.schedule(len(y))
+        planned = self.planned_fits(len(y))
+        best_seen = -np.inf
+        for rung, (rows, trees) in enumerate(schedule):
+            idx = np.sort(order[:rows])
+            X_rung, y_rung = X.iloc[idx], y[idx]
+            scores, rung_best = {}, None #only the rung leader's forest is kept
+            for c in alive:
+                self.stopped_ = self._out_of_budget(start) or self.stopped_
+                if self.stopped_ != 'completed':
+                    break
+                t = time.perf_counter()
+                model = self._fit_one(self.configs[c], X_rung, y_rung, trees)
+                self.n_fits_ += 1
+                scores[c] = model.oob_score_
+                if rung_best is None or scores[c] > scores[rung_best[0]]:
+                    rung_best = (c, model)
+                self.results_.append({'rung': rung, 'rows': rows, 'trees': trees, 'oob_r2': scores[c],
+                                      'seconds': time.perf_counter() - t, **self.configs[c]})
+                best_seen = max(best_seen, scores[c])
+                if progress is not None:
+                    progress(self.results_[-1], self.n_fits_, planned, best_seen)
+            if len(scores) == 0: #budget ran out before this rung started
+                break
+
+            ranked = sorted(scores, key=scores.get, reverse=True)
+            (leader, leader_model), resource = rung_best, (rows, trees)
+            best = scores[leader]
+            keep = max(1, int(math.ceil(len(alive) / self.eta)))
+            for c in ranked[keep:] + [c for c in alive if c not in scores]:
+                self.pruned_.append({'rung': rung, 'oob_r2': scores.get(c, np.nan), **self.configs[c]})
+            alive = ranked[:keep]
+
+            if self.stopped_ != 'completed':
+                break
+            if rung > 0 and rung < len(schedule) - 1 and best - best_prev < self.tol:
+                self.stopped_ = 'no_improvement'
+                break
+            best_prev = best
+
+        self.best_params_ = {'n_estimators': self.max_trees, **self.configs[leader]}
+        if resource == (len(y), self.max_trees):
+            self.best_estimator_ = leader_model
+        else: #stopped before the last rung - refit the leader on everything
+            self.best_estimator_ = self._fit_one(self.configs[leader], X, y, self.max_trees)
+            self.n_fits_ += 1
+        self.best_score_ = self.best_estimator_.oob_score_
+        self.elapsed_ = time.perf_counter() - start
+        return self
+
+    def report(self):
+        '''Every fit, best first within each rung'''
+        return pd.DataFrame(self.results_).sort_values(['rung', 'oob_r2'], ascending=[False, False]).reset_index(drop=True)
@@ -0,0 +1,140 @@
+#load packages
+import json
+import numpy as np
+from store import atomic_write_json
+from bins import BIN_COLUMNS
+
+
+class QuantileSketch:
+    '''
+    Mergeable quantile sketch (merging t-digest). Keeps at most ~compression weighted centroids,
+    small at the tails and larger in the middle, so q1/q3 stay accurate while the
+    sketch size is fixed no matter how many shots are added.
+    '''
+    def __init__(self, compression = 200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, np.ones(len(values))]))
+        return self
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+        return self
+
+    #vectorized compression - bucket centroids by the k1 scale function and merge each bucket
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind='mergesort')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        bucket = np.floor(k - k[0]).astype(np.int64)
+        w = np.bincount(bucket, weights=weights)
+        m = np.bincount(bucket, weights=weights * means)
+        keep = w > 0
+        self.weights = w[keep]
+        self.means = m[keep] / self.weights
+
+    def quantile(self, q):
+        total = self.count
+        if total == 0:
+            return np.nan
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xs = np.concatenate([[0], centers, [total]])
+        ys = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(np.asarray(q) * total, xs, ys))
+
+    def to_dict(self):
+        return {'compression': self.compression, 'min': self.min, 'max': self.max,
+                'means': self.means.tolist(), 'weights': self.weights.tolist()}
+
+    @classmethod
+    def from_dict(cls, d):
+        sk = cls(d['compression'])
+        sk.min, sk.max = d['min'], d['max']
+        sk.means = np.asarray(d['means'], dtype=np.float64)
+        sk.weights = np.asarray(d['weights'], dtype=np.float64)
+        return sk
+
+
+class OutlierSketches:
+    '''
+    Quantile sketches for every numeric column, globally and per club, persisted next to the
+    store (shot_store/_sketches.json). sync() folds in only the segments committed since the
+    last sync, so IQR bounds are maintained at ingest instead of recomputed on every load.
+    '''
+    def __init__(self, store, compression = 200):
+        self.store = store
+        self.compression = compression
+        self.file = store.root / '_sketches.json'
+        self.segments = set()
+        self.sketches = {} #column -> sketch
+        self.club_sketches = {} #club -> column -> sketch
+        self.load()
+
+    def load(self):
+        if not self.file.exists():
+            return
+        with open(self.file, 'r') as f:
+            data = json.load(f)
+        self.segments = set(data['segments'])
+        self.sketches = {c: QuantileSketch.from_dict(d) for c, d in data['global'].items()}
+        self.club_sketches = {club: {c: QuantileSketch.from_dict(d) for c, d in cols.items()}
+                              for club, cols in data['by_club'].items()}
+
+    def save(self):
+        atomic_write_json(self.file, {
+            'segments': sorted(self.segments),
+            'global': {c: sk.to_dict() for c, sk in self.sketches.items()},
+            'by_club': {club: {c: sk.to_dict() for c, sk in cols.items()} for club, cols in self.club_sketches.items()}})
+
+    def update(self, df):
+        numeric = [c for c in df.select_dtypes(include='number').columns if c not in BIN_COLUMNS]
+        for col in numeric:
+            self.sketches.setdefault(col, QuantileSketch(self.compression)).update(df[col].to_numpy())
+        for club, part in df.groupby('Club', observed=True):
+            cols = self.club_sketches.setdefault(str(club), {})
+            for col in numeric:
+                cols.setdefault(col, QuantileSketch(self.compression)).update(part[col].to_numpy())
+
+    #fold newly committed segments into the sketches - rebuilds only if segments were replaced
+    def sync(self, save = True):
+        current = set(seg['file'] for seg in self.store.manifest()['segments'])
+        if len(self.segments - current) > 0:
+            self.segments, self.sketches, self.club_sketches = set(), {}, {}
+        new = sorted(current - self.segments)
+        if len(new) == 0:
+            return self
+        self.update(self.store.read_files([self.store.root / f for f in new]))
+        self.segments |= set(new)
+        if save:
+            self.save()
+        return self
+
+    #IQR fences from the sketched quartiles
+    def bounds(self, col, club = None):
+        sk = self.sketches.get(col) if club is None else self.club_sketches.get(club, {}).get(col)
+        if sk is None or sk.count == 0:
+            return np.nan, np.nan
+        q1, q3 = sk.quantile(0.25), sk.quantile(0.75)
+        IQR = q3 - q1
+        return q1 - 1.5 * IQR, q3 + 1.5 * IQR
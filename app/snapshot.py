@@ -0,0 +1,83 @@
+#load packages
+import json
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+from store import atomic_write_json
+
+
+class Snapshot:
+    '''
+    Immutable Arrow IPC snapshot of the cleaned shot table, published next to the store
+        shot_store/_snapshot/shots-v<store version>-<id>.arrow
+        shot_store/_snapshot/CURRENT  <- {file, store_version}, swapped in with os.replace
+    The ingest publishes it after each commit (Preprocessor.publish_snapshot), readers only map it.
+    Every session and worker process memory-maps the current file, so the processed table is held
+    once by the OS page cache instead of once per process. Columns are written without validity
+    bitmaps (NaN stays a float value) so numeric columns map into pandas zero-copy (read-only).
+    '''
+    def __init__(self, store, keep = 2):
+        self.store = store
+        self.keep = keep #older snapshots kept for sessions that still map them
+        self.root = store.root / '_snapshot'
+        self.pointer = self.root / 'CURRENT'
+
+    def current(self):
+        if not self.pointer.exists():
+            return None
+        with open(self.pointer, 'r') as f:
+            return json.load(f)
+
+    def is_current(self, store_version):
+        pointer = self.current()
+        return pointer is not None and pointer['store_version'] == store_version and (self.root / pointer['file']).exists()
+
+    def publish(self, df, store_version):
+        self.root.mkdir(parents=True, exist_ok=True)
+        arrays = []
+        for col in df.columns:
+            values = df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes = values.cat.codes.to_numpy()
+                arrays.append(pa.DictionaryArray.from_arrays(codes, pa.array(values.cat.categories.astype(str)), mask=codes == -1)) #null club -> null
+            elif pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+                arrays.append(pa.array(values.to_numpy(), from_pandas=False)) #NaN kept as a value, no null bitmap
+            else:
+                arrays.append(pa.array(values.astype(str).to_numpy()))
+        table = pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+
+        name = f"shots-v{store_version}-{uuid.uuid4().hex[:8]}.arrow"
+        tmp = self.root / f".{name}.tmp"
+        with pa.OSFile(str(tmp), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=max(table.num_rows, 1)) #one record batch - one contiguous buffer per column
+        os.replace(tmp, self.root / name)
+        atomic_write_json(self.pointer, {'file': name, 'store_version': store_version, 'rows': table.num_rows})
+        self.prune()
+        return self.root / name
+
+    #drop all but the newest `keep` snapshots (already mapped files stay readable after unlink)
+    def prune(self):
+        pointer = self.current()
+        files = sorted(self.root.glob('shots-v*.arrow'), key=lambda p: p.stat().st_mtime, reverse=True)
+        for f in files[self.keep:]:
+            if pointer is None or f.name != pointer['file']:
+                try:
+                    os.remove(f)
+                except OSError:
+                    pass
+
+    def load(self, store_version, columns = None):
+        '''Map the current snapshot if it was published for store_version, else None'''
+        pointer = self.current()
+        if pointer is None or pointer['store_version'] != store_version:
+            return None
+        try:
+            source = pa.memory_map(str(self.root / pointer['file']), 'r')
+        except FileNotFoundError: #pruned by a newer publish, caller rebuilds
+            return None
+        table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select([c for c in table.column_names if c in set(columns)])
+        return table.to_pandas(split_blocks=True, self_destruct=False)
@@ -0,0 +1,206 @@
+#load packages
+import os
+import re
+import json
+import uuid
+import hashlib
+import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pathlib import Path
+from units import to_yards
+from schema import enforce_schema
+from bins import add_bin_codes
+
+
+class ShotStore:
+    '''
+    Columnar shot store - append-only parquet segments partitioned by session date
+        shot_store/session_date=2025-04-12/part-<id>.parquet
+        shot_store/_manifest.json  <- list of committed segments + ingest watermark
+    Columns are typed once at ingest (Date = timestamp, DistanceToPin = float yards)
+    so loads skip the csv/string parsing entirely.
+    Segments only become visible once the manifest is swapped in (os.replace), so a
+    crash mid-ingest leaves the previous version intact.
+    '''
+    partition_key = 'session_date'
+
+    def __init__(self, root = 'shot_store'):
+        self.path = Path(__file__).resolve().parent
+        self.root = self.path / root
+        self.manifest_file = self.root / '_manifest.json'
+
+    def exists(self):
+        return len(self.manifest()['segments']) > 0
+
+    def manifest(self):
+        if self.manifest_file.exists():
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        return {'version': 0, 'watermark': None, 'committed_at': None, 'segments': []}
+
+    def version(self):
+        return self.manifest()['version']
+
+    #hash of what is committed (source, content hash, session date, rows of each segment) - unlike the version
+    #counter or file mtimes it survives copying or re-seeding the same shots, so keys built on it stay valid
+    def content_hash(self):
+        segments = sorted((seg.get('source') or '', seg.get('source_hash') or '', seg['session_date'], seg['rows'])
+                          for seg in self.manifest()['segments'])
+        return hashlib.sha1(json.dumps(segments).encode()).hexdigest()[:16]
+
+    def watermark(self):
+        return self.manifest()['watermark']
+
+    #committed parquet files, optionally pruned to partitions inside the date range
+    def files(self, date_range = None):
+        files = []
+        if date_range is not None:
+            start = pd.to_datetime(date_range[0]).date().isoformat()
+            end = pd.to_datetime(date_range[1]).date().isoformat()
+        for seg in self.manifest()['segments']:
+            if date_range is not None and not (start <= seg['session_date'] <= end):
+                continue
+            files.append(self.root / seg['file'])
+        return files
+
+    def columns(self):
+        files = self.files()
+        if len(files) == 0:
+            return []
+        return self.schema(files).names
+
+    #exports drop all-zero cols, so files can have different column sets
+    #(permissive so float64 segments written before the float32 schema still unify)
+    def schema(self, files):
+        return pa.unify_schemas([pq.read_schema(f) for f in files], promote_options='permissive')
+
+    def read(self, columns = None, date_range = None):
+        df = self.read_files(self.files(date_range), columns=columns)
+        if date_range is not None and 'Date' in df.columns:
+            df = df[df['Date'].between(pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1]))]
+            df = df.reset_index(drop=True)
+        return df
+
+    def read_files(self, files, columns = None):
+        if len(files) == 0:
+            return pd.DataFrame(columns=columns)
+        schema = self.schema(files)
+        if columns is not None:
+            columns = [c for c in columns if c in schema.names] #project only what exists
+        dataset = ds.dataset([str(f) for f in files], schema=schema, format='parquet')
+        return dataset.to_table(columns=columns).to_pandas()
+
+    #write new segments and commit them in one manifest swap
+    #replace = source files whose earlier segments are superseded by this commit (re-exports)
+    def append(self, frames, sources = None, hashes = None, replace = None, watermark = None):
+        manifest = self.manifest()
+        new_segments = []
+        for i, df in enumerate(frames):
+            for seg in self._write_segments(df):
+                seg['source'] = None if sources is None else str(sources[i])
+                seg['source_hash'] = None if hashes is None else hashes[i]
+                new_segments.append(seg)
+
+        old_segments = manifest['segments']
+        kept = old_segments
+        if replace:
+            kept = [seg for seg in old_segments if seg.get('source') not in set(replace)]
+        manifest['segments'] = kept + new_segments
+        if len(new_segments) > 0 or len(kept) != len(old_segments):
+            manifest['version'] += 1
+        manifest['committed_at'] = datetime.datetime.now().isoformat()
+        if watermark is not None:
+            manifest['watermark'] = watermark
+        atomic_write_json(self.manifest_file, manifest) #commit point
+        return new_segments
+
+    #content hashes of every committed export
+    def source_hashes(self):
+        return set(seg.get('source_hash') for seg in self.manifest()['segments'] if seg.get('source_hash'))
+
+    #one file per session date, not visible until committed
+    def _write_segments(self, df):
+        df = to_store_types(df)
+        segments = []
+        for day, part in df.groupby(df['Date'].dt.date, sort=True):
+            rel = Path(f"{self.partition_key}={day.isoformat()}") / f"part-{uuid.uuid4().hex}.parquet"
+            dest = self.root / rel
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.parent / f".{dest.name}.tmp"
+            table = pa.Table.from_pandas(part.reset_index(drop=True), preserve_index=False)
+            pq.write_table(table, tmp)
+            os.replace(tmp, dest)
+            segments.append({'file': rel.as_posix(), 'session_date': day.isoformat(), 'rows': int(part.shape[0])})
+        return segments
+
+    #one-off conversion of the legacy master csv
+    #sources = {session minute: export file name} - those sessions are committed under their export's name, so a
+    #later re-export of one replaces its rows; sessions without a known export keep the master's name
+    def seed_from_csv(self, csv_file, watermark = None, sources = None):
+        df = pd.read_csv(csv_file)
+        dates = pd.to_datetime(df['Date'])
+        if watermark is None:
+            #master dates are minute resolution, step past the last exported session
+            watermark = (dates.max() + pd.Timedelta(minutes=1)).isoformat()
+        names = dates.dt.floor('min').map(sources or {}).fillna(Path(csv_file).name)
+        groups = [(name, part) for name, part in df.groupby(names.to_numpy(), sort=False)]
+        return self.append([part for _, part in groups], sources=[name for name, _ in groups], watermark=watermark)
+
+
+#one store per golfer - the original single-player store is the default player,
+#everyone else gets their own partition under shot_store/players/<name> (own manifest, sketches, rollup, snapshot)
+DEFAULT_PLAYER = 'default'
+PLAYER_NAME = re.compile(r'^[A-Za-z0-9_\-]+$')
+PLAYERS_DIR = Path('shot_store') / 'players'
+
+def player_store(player = DEFAULT_PLAYER):
+    if player == DEFAULT_PLAYER:
+        return ShotStore()
+    if not PLAYER_NAME.match(str(player)):
+        raise ValueError(f"Invalid player name {player!r} (letters, digits, _ and - only)")
+    return ShotStore(root=PLAYERS_DIR / player)
+
+
+#players with committed data, default first
+def players():
+    found = [DEFAULT_PLAYER]
+    root = Path(__file__).resolve().parent / PLAYERS_DIR
+    if root.exists():
+        for entry in sorted(os.scandir(root), key=lambda e: e.name.lower()):
+            if entry.is_dir() and PLAYER_NAME.match(entry.name) and (Path(entry.path) / '_manifest.json').exists():
+                found.append(entry.name)
+    return found
+
+
+#write json to a temp file and swap it in so readers never see a partial file
+def atomic_write_json(path, obj):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".{path.name}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(obj, f, indent = 2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+#convert a cleaned/master frame to the typed store layout (schema.SHOT_SCHEMA, club as plain strings on disk)
+def to_store_types(df):
+    if 'DistanceToPin_Yrds' in df.columns: #legacy master layout
+        df = df.assign(DistanceToPin=to_yards(df['DistanceToPin_Yrds'])).drop(columns=['DistanceToPin_Yrds'])
+    df = enforce_schema(df)
+    df['Club'] = df['Club'].astype(str)
+    return add_bin_codes(df) #int8 carry / smash bin codes stored with the shots
+
+
+if __name__ == '__main__':
+    #build the store from master.csv
+    store = ShotStore()
+    if store.exists():
+        print(f"Shot store already exists at {store.root}")
+    else:
+        written = store.seed_from_csv(store.path / 'master.csv')
+        print(f"Shot store written to {store.root} ({len(written)} segments)")
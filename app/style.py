@@ -1,4 +1,8 @@
 import streamlit as st
+import pandas as pd
+from perf import ENABLED as PERF_ENABLED, timer, run_timings
+from cache import shared_cache
+from store import DEFAULT_PLAYER, players
 
 def custom_sidebar_css():
     st.markdown("""
@@ -64,4 +68,44 @@ def custom_metric_card(label, value):
     """, unsafe_allow_html=True)
 
 
+#tab bar that only reports the active tab - the page renders just that one instead of every st.tabs body
+def tab_selector(labels, key):
+    active = st.segmented_control("View", labels, default=labels[0], key=key, label_visibility='collapsed')
+    return active if active is not None else labels[0] #clicking the active tab deselects it
 
+
+#st.plotly_chart timed as its own stage (figure serialization + send)
+def plotly_chart(fig, **kwargs):
+    with timer('plotly_chart'):
+        return st.plotly_chart(fig, **kwargs)
+
+
+#developer panel (SIMSHOT_PERF=1) - stage timings of this rerun + shared cache hit rate
+def perf_panel():
+    if not PERF_ENABLED:
+        return
+    with st.sidebar.expander("Performance", expanded=False):
+        totals, counters = run_timings()
+        stages = pd.DataFrame([{'Stage': stage, 'Calls': calls, 'ms': round(ms, 1)} for stage, (calls, ms) in totals.items()])
+        if stages.shape[0] > 0:
+            st.dataframe(stages.sort_values('ms', ascending=False), hide_index=True)
+        for name, value in counters.items():
+            st.caption(f"{name}: {value:,}")
+        stats = shared_cache.stats()
+        st.caption(f"Cache: {stats['entries']} entries, {stats['bytes'] / 1e6:.1f}/{stats['max_bytes'] / 1e6:.0f} MB, "
+                   f"hit rate {stats['hit_rate']:.0%} ({stats['hits']} hits / {stats['misses']} misses)")
+
+
+#golfer picked in the sidebar - kept in session state so it carries across pages and reruns
+def selected_player():
+    player = st.session_state.get('player', DEFAULT_PLAYER)
+    if player not in players():
+        player = DEFAULT_PLAYER
+    st.session_state['player'] = player #re-set so the widget value survives a page switch
+    return player
+
+#sidebar player picker, only shown once a second player has data
+def player_selector():
+    options = players()
+    if len(options) > 1:
+        st.selectbox('Player', options, key='player')
@@ -0,0 +1,132 @@
+#load packages
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+#raw gspro export layout, in column order (create_init.clean adds Date and parses DistanceToPin)
+EXPORT_COLUMNS = ['Carry', 'TotalDistance', 'BallSpeed', 'BackSpin', 'SideSpin', 'HLA', 'VLA', 'Decent', 'PeakHeight',
+                  'Offline', 'rawSpinAxis', 'rawCarryGame', 'Club', 'ClubSpeed', 'Path', 'AoA', 'FaceToTarget',
+                  'FaceToPath', 'SmashFactor', 'DistanceToPin']
+
+#club -> (share of shots, club speed mph, smash factor, carry yds, launch deg, backspin rpm, AoA deg), means from master.csv
+CLUB_PROFILES = {
+    'DR': (0.14, 90.0, 1.44, 183.0, 11.8, 2500.0, 2.9),
+    'W5': (0.13, 86.0, 1.42, 152.0, 10.6, 3100.0, 1.6),
+    'I5': (0.16, 77.0, 1.38, 119.0, 10.2, 2750.0, -6.3),
+    'I6': (0.06, 74.0, 1.41, 122.0, 10.9, 3250.0, -7.1),
+    'I7': (0.09, 73.4, 1.39, 137.0, 14.1, 4000.0, -6.8),
+    'I8': (0.10, 73.2, 1.42, 109.0, 16.1, 4200.0, -7.3),
+    'I9': (0.05, 72.4, 1.28, 116.0, 17.0, 5200.0, -7.6),
+    'PW': (0.13, 68.4, 1.24, 102.0, 20.6, 6600.0, -7.7),
+    'GW': (0.06, 69.4, 1.19, 104.0, 22.7, 6900.0, -7.4),
+    'SW': (0.02, 71.4, 0.98, 82.0, 26.3, 6900.0, -7.5),
+}
+
+
+def generate_shots(n, seed = 0, mishit_rate = 0.02):
+    '''
+    n synthetic shots in the raw export layout. Ball flight is derived from club speed x smash so
+    metrics stay correlated like real sessions, and a share of mishits gives the IQR filter outliers.
+    Values are never exactly 0 (clean() drops columns that contain a 0).
+    '''
+    rng = np.random.default_rng(seed)
+    clubs = list(CLUB_PROFILES)
+    profile = np.array([CLUB_PROFILES[c] for c in clubs])
+    idx = rng.choice(len(clubs), size=n, p=profile[:, 0] / profile[:, 0].sum())
+    share, club_speed, smash, carry, launch, spin, aoa = (profile[idx, i] for i in range(profile.shape[1]))
+
+    mishit = rng.random(n) < mishit_rate
+    club_speed = club_speed + rng.normal(0, 2.5, n)
+    smash = np.where(mishit, smash * rng.uniform(0.55, 0.85, n), smash + rng.normal(0, 0.04, n))
+    ball_speed = club_speed * smash
+    launch = launch + rng.normal(0, 2.0, n)
+    carry = carry * (ball_speed / (profile[idx, 1] * profile[idx, 2])) ** 1.4 * np.where(mishit, rng.uniform(0.4, 0.8, n), 1.0)
+    carry = np.maximum(carry + rng.normal(0, 6.0, n), 5.0)
+    spin = np.maximum(spin * rng.lognormal(0, 0.2, n), 300.0)
+
+    path = rng.normal(2.0, 2.5, n)
+    face_to_path = rng.normal(4.5, 4.0, n)
+    face_to_target = path + face_to_path - rng.normal(6.5, 2.0, n)
+    spin_axis = face_to_path * 2.5 + rng.normal(0, 8.0, n)
+    hla = face_to_target * 0.8 + rng.normal(0, 1.0, n)
+    offline = np.tan(np.radians(hla + spin_axis * 0.3)) * carry
+    peak = carry * np.tan(np.radians(launch)) * 0.55 + rng.normal(0, 4.0, n)
+    descent = launch * 1.9 + rng.normal(0, 4.0, n)
+    total = carry + np.maximum(rng.normal(18.0, 6.0, n) - launch * 0.6, 0.5)
+    pin = np.abs(rng.normal(0, 1.0, n)) * (carry * 0.12 + 4.0)
+
+    #short leaves come out in feet, everything else in yards
+    in_feet = pin < 3.0
+    distance_to_pin = np.where(in_feet, np.char.add(np.round(pin * 3, 1).astype(str), ' ft'),
+                               np.char.add(np.round(pin, 2).astype(str), ' yds'))
+
+    def nonzero(values):
+        return np.where(values == 0, 1e-3, values)
+
+    return pd.DataFrame({
+        'Carry': carry, 'TotalDistance': total, 'BallSpeed': ball_speed, 'BackSpin': spin,
+        'SideSpin': nonzero(np.round(spin * np.sin(np.radians(spin_axis)))), 'HLA': nonzero(hla),
+        'VLA': launch, 'Decent': descent, 'PeakHeight': np.abs(peak) + 1.0, 'Offline': nonzero(offline),
+        'rawSpinAxis': nonzero(spin_axis), 'rawCarryGame': carry * rng.normal(0.99, 0.01, n),
+        'Club': np.array(clubs)[idx], 'ClubSpeed': club_speed, 'Path': nonzero(path), 'AoA': nonzero(aoa + rng.normal(0, 1.4, n)),
+        'FaceToTarget': nonzero(face_to_target), 'FaceToPath': nonzero(face_to_path), 'SmashFactor': smash,
+        'DistanceToPin': distance_to_pin,
+    }, columns=EXPORT_COLUMNS)
+
+
+#session start times - one session a day until the sessions would span more than MAX_SPAN_DAYS, then several a
+#day spread across it (busy range days), so large presets stay within a few years and the %y file names never wrap
+MAX_SPAN_DAYS = 3 * 365
+
+def session_starts(n_sessions, start = '2025-01-01 10:00:00'):
+    per_day = max(1, -(-n_sessions // MAX_SPAN_DAYS))
+    i = np.arange(n_sessions)
+    minutes = (i % per_day) * (24 * 60 // per_day)
+    return (pd.Timestamp(start) + pd.to_timedelta(i // per_day, unit='D') + pd.to_timedelta(minutes, unit='m')
+            + pd.to_timedelta(i % 60, unit='s'))
+
+
+def write_exports(n, out_dir, session_size = 200, start = '2025-01-01 10:00:00', seed = 0):
+    '''
+    Write n shots as gsproexport<MM-DD-YY-HH-MM-SS>.csv files of ~session_size shots (see session_starts).
+    Like real exports, the first row is repeated (clean_export drops it). Returns the file paths.
+    '''
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shots = generate_shots(n, seed=seed)
+    starts = session_starts(-(-n // session_size), start)
+    paths = []
+    for i, lo in enumerate(range(0, n, session_size)):
+        session = shots.iloc[lo:lo + session_size]
+        session = pd.concat([session.iloc[:1], session])
+        ts = starts[i]
+        path = out_dir / f"gsproexport{ts.strftime('%m-%d-%y-%H-%M-%S')}.csv"
+        session.to_csv(path, index=False)
+        paths.append(str(path))
+    return paths
+
+
+def generate_frame(n, session_size = 200, start = '2025-01-01 10:00:00', seed = 0):
+    '''n shots already in the cleaned layout (Date + numeric DistanceToPin in yards) - skips the csv round trip'''
+    from units import normalize_units
+    shots = generate_shots(n, seed=seed)
+    session = np.arange(n) // session_size
+    shots['Date'] = session_starts(session[-1] + 1 if n > 0 else 0, start)[session]
+    return normalize_units(shots)
+
+
+#preset sizes for benchmarks
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write synthetic GSPro exports')
+    parser.add_argument('--shots', default='10k', help='number of shots or a preset (10k, 1m, 10m)')
+    parser.add_argument('--out', default='synthetic_exports', help='output folder')
+    parser.add_argument('--session-size', type=int, default=200, help='shots per export file')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    n = SIZES.get(args.shots.lower()) or int(args.shots)
+    paths = write_exports(n, args.out, session_size=args.session_size, seed=args.seed)
+    print(f"Wrote {n} shots to {len(paths)} exports in {os.path.abspath(args.out)}")
@@ -0,0 +1,28 @@
+#app modules import each other flat (from store import ShotStore) - run them the same way here
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from synthetic import generate_frame
+from store import ShotStore
+
+
+#cleaned-layout shots over a few days, with some clubs missing
+@pytest.fixture
+def shots():
+    df = generate_frame(3000, session_size=150, seed=1)
+    df.loc[np.random.default_rng(1).random(len(df)) < 0.01, 'Club'] = None
+    return df
+
+
+#parquet store holding those shots, one commit per session like the ingest
+@pytest.fixture
+def store(tmp_path, shots):
+    store = ShotStore(root=tmp_path / 'shot_store')
+    for _, session in shots.groupby('Date', sort=True):
+        store.append([session])
+    return store
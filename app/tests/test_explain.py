@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from explain import stratified_sample, ShapEngine
+
+
+def test_caps_rows_per_group_and_keeps_order():
+    groups = ['DR'] * 50 + ['PW'] * 3 + ['I7'] * 20
+    rows = stratified_sample(groups, per_group=10, seed=0)
+    picked = pd.Series(groups).iloc[rows].value_counts()
+    assert picked.to_dict() == {'DR': 10, 'I7': 10, 'PW': 3}
+    assert np.all(np.diff(rows) > 0)
+
+
+def test_missing_labels_form_their_own_group():
+    groups = np.array(['DR'] * 20 + [None] * 5, dtype=object)
+    rows = stratified_sample(groups, per_group=4, seed=0)
+    assert pd.isna(groups[rows]).sum() == 4
+    assert len(rows) == 8
+
+
+def test_all_rows_and_seed():
+    groups = np.repeat(['DR', 'PW'], 30)
+    assert np.array_equal(stratified_sample(groups, per_group=0), np.arange(60))
+    assert np.array_equal(stratified_sample(groups, 5, seed=3), stratified_sample(groups, 5, seed=3))
+    assert not np.array_equal(stratified_sample(groups, 5, seed=3), stratified_sample(groups, 5, seed=4))
+
+
+def test_engine_caches_per_model():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, 3)), columns=['a', 'b', 'c'])
+    y = X['a'] * 2 + rng.normal(size=200)
+    first = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    second = RandomForestRegressor(n_estimators=10, random_state=1).fit(X, y)
+    engine = ShapEngine(mode='approx', per_club=50, workers=1)
+    values, rows = engine.explain(first, X)
+    assert values.shape == (50, 3) and len(rows) == 50
+    assert engine.explain(first, X)[0] is values #cache hit
+    assert not np.allclose(engine.explain(second, X)[0], values) #refit never gets the first model's values
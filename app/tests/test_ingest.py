@@ -0,0 +1,80 @@
+import os
+import pandas as pd
+import pytest
+
+import store as store_module
+from ingest_manifest import IngestManifest
+from store import ShotStore
+from synthetic import write_exports
+from update_master import ingest
+
+
+@pytest.fixture
+def exports(tmp_path):
+    return write_exports(600, tmp_path / 'exports', session_size=200)
+
+
+@pytest.fixture
+def target(tmp_path):
+    manifest = IngestManifest(db=tmp_path / 'ingest.db')
+    yield ShotStore(root=tmp_path / 'ingest_store'), manifest
+    manifest.close()
+
+
+def test_rerun_is_idempotent(exports, target):
+    store, manifest = target
+    assert ingest(exports, store, manifest)[0] == 'success'
+    version, rows = store.version(), store.read().shape[0]
+    assert rows == 600
+    status, _, cleaned, _ = ingest(exports, store, manifest)
+    assert (status, cleaned) == ('success', [])
+    assert (store.version(), store.read().shape[0]) == (version, rows)
+
+
+def test_crash_before_commit_keeps_previous_version(exports, target, monkeypatch):
+    store, manifest = target
+    ingest(exports[:2], store, manifest)
+    version, before = store.version(), store.read()
+    def crash(path, obj):
+        raise OSError('killed before the manifest swap')
+    monkeypatch.setattr(store_module, 'atomic_write_json', crash)
+    assert ingest(exports[2:], store, manifest)[0] == 'failure'
+    assert store.version() == version
+    pd.testing.assert_frame_equal(store.read(), before)
+    monkeypatch.undo() #the next run picks the export up again
+    assert ingest(exports, store, manifest)[0] == 'success'
+    assert store.read().shape[0] == 600
+
+
+def test_reexport_replaces_old_segments(exports, target):
+    store, manifest = target
+    ingest(exports, store, manifest)
+    session = pd.read_csv(exports[0])
+    session.iloc[1:51].to_csv(exports[0], index=False) #re-exported with fewer shots (first row is the repeat)
+    assert ingest(exports, store, manifest)[0] == 'success'
+    data = store.read()
+    assert data.shape[0] == 600 - 200 + 49
+    sources = [seg['source'] for seg in store.manifest()['segments']]
+    assert sources.count(os.path.basename(exports[0])) == 1
+
+
+def test_same_content_under_new_name_ingested_once(exports, target, tmp_path):
+    store, manifest = target
+    ingest(exports, store, manifest)
+    version = store.version()
+    renamed = tmp_path / 'exports' / 'gsproexport12-31-25-23-59-59.csv'
+    renamed.write_bytes(open(exports[1], 'rb').read())
+    status, _, cleaned, _ = ingest(exports + [str(renamed)], store, manifest)
+    assert (status, cleaned) == ('success', [])
+    assert store.version() == version and store.read().shape[0] == 600
+
+
+def test_bad_export_name_does_not_abort_the_batch(exports, target, tmp_path):
+    store, manifest = target
+    bad = tmp_path / 'exports' / 'gsproexport-renamed-by-hand.csv'
+    bad.write_bytes(open(exports[0], 'rb').read() + b'\n')
+    status, _, cleaned, failures = ingest(exports + [str(bad)], store, manifest)
+    assert status == 'partial'
+    assert sorted(cleaned) == sorted(os.path.basename(p) for p in exports)
+    assert list(failures) == [bad.name]
+    assert store.read().shape[0] == 600
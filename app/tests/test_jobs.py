@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+
+from jobs import Job, JobCancelled, JobQueue
+
+
+def wait(job, timeout = 5):
+    end = time.time() + timeout
+    while job.active() and time.time() < end:
+        time.sleep(0.01)
+    return job.status
+
+
+def test_same_key_shares_one_job():
+    queue = JobQueue(workers=2)
+    release = threading.Event()
+    calls = []
+    def train(job):
+        calls.append(job.id)
+        release.wait(5)
+        return 42
+    first = queue.submit(('v1', 'rf'), train)
+    assert queue.submit(('v1', 'rf'), train) is first
+    other = queue.submit(('v2', 'rf'), train)
+    assert other is not first
+    release.set()
+    assert wait(first) == 'done' and wait(other) == 'done'
+    assert first.result == 42 and len(calls) == 2
+    assert queue.submit(('v1', 'rf'), train) is not first #finished jobs are resubmitted
+
+
+def test_cancel_lands_at_next_update():
+    queue = JobQueue(workers=1)
+    started, steps = threading.Event(), []
+    def train(job):
+        while len(steps) < 500: #bounded - a broken cancel fails the test instead of hanging it
+            job.update(step=len(steps))
+            steps.append(1)
+            started.set()
+            time.sleep(0.01)
+    job = queue.submit('rf', train)
+    started.wait(5)
+    queue.cancel('rf')
+    assert wait(job) == 'cancelled'
+    assert job.result is None and job.error is None
+    with pytest.raises(JobCancelled):
+        job.update(step=-1)
+
+
+def test_cancel_before_start_skips_the_job():
+    job = Job('rf', lambda job: pytest.fail('cancelled job ran'))
+    job.cancel()
+    job.run()
+    assert job.status == 'cancelled'
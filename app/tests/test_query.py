@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from process import Preprocessor
+from utils import filter_data, distinct, min_max
+from test_utils import selections
+
+pytest.importorskip('duckdb')
+
+
+@pytest.fixture
+def backends(store):
+    eager = Preprocessor(store=store, backend='pandas').process_data()
+    lazy = Preprocessor(store=store, backend='duckdb').lazy_data()
+    return eager, lazy
+
+
+def test_filter_matches_pandas(backends):
+    eager, lazy = backends
+    for date_range, club in selections(eager, n=20):
+        expected = filter_data(eager, date_range, club).reset_index(drop=True)
+        got = filter_data(lazy, date_range, club)
+        pd.testing.assert_frame_equal(got, expected[list(got.columns)], check_categorical=False)
+
+
+def test_aggregate_matches_pandas(backends):
+    eager, lazy = backends
+    got = lazy.aggregate(['Club'], Carry=('Carry', 'mean'), Count=('Carry', 'count')).dropna(subset=['Club'])
+    expected = eager.groupby('Club', observed=True)['Carry'].agg(['mean', 'count'])
+    assert got['Count'].tolist() == expected.loc[got['Club'], 'count'].tolist()
+    assert got['Carry'].to_numpy() == pytest.approx(expected.loc[got['Club'], 'mean'].to_numpy(), rel=1e-5)
+
+
+def test_distinct_and_min_max_match_pandas(backends):
+    eager, lazy = backends
+    assert distinct(lazy, 'Club') == [str(c) for c in distinct(eager, 'Club')]
+    assert min_max(lazy, 'Date') == min_max(eager, 'Date')
+    assert lazy.shape[0] == eager.shape[0]
+
+
+def test_get_data_stays_a_dataframe(store):
+    preprocessor = Preprocessor(store=store, backend='duckdb')
+    assert isinstance(preprocessor.get_data(), pd.DataFrame)
+    assert preprocessor.lazy() is not None and not isinstance(preprocessor.lazy(), pd.DataFrame)
+    assert Preprocessor(store=store, backend='pandas').lazy() is None
@@ -0,0 +1,42 @@
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from registry import ModelRegistry
+from store import ShotStore
+
+
+def put(registry, key):
+    model = RandomForestRegressor(n_estimators=2, random_state=0).fit([[0.0], [1.0]], [0.0, 1.0])
+    importance = pd.DataFrame({'Feature': ['x'], 'Importance': [1.0]})
+    return registry.put(key, model, {'oob': np.nan, 'mse': 1.0, 'r2': 0.5}, importance, np.zeros((2, 1)))
+
+
+def test_key_survives_copying_the_store(store, tmp_path):
+    copy = ShotStore(root=tmp_path / 'copy')
+    shutil.copytree(store.root, copy.root)
+    assert copy.content_hash() == store.content_hash()
+    registry = ModelRegistry(store)
+    put(registry, [store.content_hash(), 'rf'])
+    shutil.copytree(registry.root, copy.root / '_models')
+    assert ModelRegistry(copy).get([copy.content_hash(), 'rf']) is not None
+
+
+def test_get_never_writes_and_nan_is_null(store):
+    registry = ModelRegistry(store)
+    entry = put(registry, ['k'])
+    meta_file = entry / 'meta.json'
+    json.loads(meta_file.read_text(), parse_constant=reject_constant) #strict json
+    before = meta_file.stat().st_mtime_ns
+    stored = registry.get(['k'])
+    assert stored['metrics']['oob'] is None
+    assert meta_file.stat().st_mtime_ns == before
+    put(registry, ['other']) #the next write saves the use
+    assert json.loads(meta_file.read_text())['last_used'] > stored['meta']['last_used']
+
+
+def reject_constant(constant):
+    raise AssertionError(f"{constant} in meta.json")
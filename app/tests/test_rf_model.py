@@ -0,0 +1,41 @@
+import pytest
+
+from rf_model import RunRandomForest
+from schema import enforce_schema
+from synthetic import generate_frame
+
+
+def prepared(df):
+    reg = RunRandomForest(df, 'Carry')
+    reg.onehotencode()
+    reg.split_data(size=0.3)
+    return reg
+
+
+@pytest.fixture(scope='module')
+def trained():
+    data = enforce_schema(generate_frame(1000, session_size=100, seed=2))
+    cutoff = data['Date'].sort_values().iloc[700]
+    reg = prepared(data[data['Date'] < cutoff])
+    reg.fit(cv=5, search='halving', max_fits=6)
+    _, mse, _ = reg.evaluate()
+    return data, reg, mse
+
+
+def test_update_warm_starts_below_drift_tol(trained):
+    data, old, mse = trained
+    model = old.tuned_rf
+    trees = len(model.estimators_)
+    reg = prepared(data)
+    status = reg.update(model, old.data['Date'].max(), baseline_mse=mse * 10, drift_tol=0.15)
+    assert status == 'updated'
+    assert reg.tuned_rf is model and len(model.estimators_) > trees
+    assert model.n_estimators == len(model.estimators_) and not model.warm_start
+
+
+def test_update_retunes_above_drift_tol(trained):
+    data, old, mse = trained
+    reg = prepared(data)
+    status = reg.update(old.tuned_rf, old.data['Date'].max(), baseline_mse=mse / 100, drift_tol=0.15)
+    assert status == 'retuned'
+    assert reg.tuned_rf is not old.tuned_rf and hasattr(reg, 'search')
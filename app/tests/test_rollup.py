@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from process import Preprocessor
+from rollup import RollupCube, metric_summary
+
+
+def summary(df, date_range, metric):
+    values = df.loc[df['Date'].between(*date_range), metric].dropna().astype(np.float64)
+    return {'count': len(values), 'mean': values.mean(), 'std': values.std(), 'min': values.min(), 'max': values.max()}
+
+
+def test_cards_match_cleaned_frame_after_fences_move(store, shots):
+    RollupCube(store).sync()
+    before = RollupCube(store).load_state()['fences']
+    #a session of long hitters moves every distance fence
+    late = shots[shots['Date'] == shots['Date'].max()].copy()
+    late['Date'] += np.timedelta64(1, 'D')
+    late[['Carry', 'TotalDistance', 'BallSpeed']] *= 1.5
+    store.append([late])
+    RollupCube(store).sync()
+    assert RollupCube(store).load_state()['fences']['Carry'] != before['Carry']
+
+    cube = RollupCube(store).load()
+    data = Preprocessor(store=store).process_data()
+    date_range = (data['Date'].min(), data['Date'].max())
+    for metric in ('Carry', 'BallSpeed', 'SideSpin'):
+        got, expected = metric_summary(cube, date_range, 'All', metric), summary(data, date_range, metric)
+        assert got['count'] == expected['count']
+        for stat in ('mean', 'std', 'min', 'max'):
+            assert got[stat] == pytest.approx(expected[stat], rel=1e-6)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from search import SuccessiveHalving
+
+GRID = {'n_estimators': [20], 'max_depth': [None, 3, 5], 'min_samples_leaf': [1, 2, 4]}
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(400, 4)), columns=['a', 'b', 'c', 'd'])
+    return X, X['a'] * 3 + X['b'] + rng.normal(size=400)
+
+
+def search(**kwargs):
+    return SuccessiveHalving(GRID, min_rows=50, min_trees=5, n_jobs=1, **kwargs)
+
+
+#every config is either pruned at some rung or survives the last rung it reached
+def assert_covers_grid(sh):
+    key = lambda r: (r['max_depth'], r['min_samples_leaf'])
+    pruned = [key(r) for r in sh.pruned_]
+    last = max(r['rung'] for r in sh.results_)
+    survivors = [key(r) for r in sh.results_ if r['rung'] == last and key(r) not in pruned]
+    assert len(pruned) == len(set(pruned))
+    assert sorted(pruned + survivors, key=str) == sorted([key(c) for c in sh.configs], key=str)
+
+
+def test_completes_and_covers_grid(data):
+    sh = search().fit(*data)
+    assert sh.stopped_ in ('completed', 'no_improvement')
+    assert_covers_grid(sh)
+    assert sh.best_estimator_.n_estimators == 20
+
+
+def test_respects_max_fits(data):
+    sh = search(max_fits=4).fit(*data)
+    assert sh.stopped_ == 'fit_budget'
+    assert len(sh.results_) == 4 and sh.n_fits_ == 5 #+ the leader's full-size refit
+    assert_covers_grid(sh)
+
+
+def test_respects_time_budget(data):
+    sh = search(time_budget=0).fit(*data)
+    assert sh.stopped_ == 'time_budget'
+    assert len(sh.results_) == 0 and sh.n_fits_ == 1
+    assert hasattr(sh.best_estimator_, 'oob_score_')
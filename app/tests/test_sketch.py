@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from sketch import QuantileSketch
+
+
+@pytest.mark.parametrize('dist', ['normal', 'lognormal', 'uniform'])
+def test_quartiles_close_to_exact(dist):
+    rng = np.random.default_rng(0)
+    values = getattr(rng, dist)(size=100_000)
+    sk = QuantileSketch()
+    for chunk in np.array_split(values, 50): #fed like ingest batches
+        sk.update(chunk)
+    spread = np.percentile(values, 75) - np.percentile(values, 25)
+    for q in (0.25, 0.5, 0.75):
+        assert abs(sk.quantile(q) - np.percentile(values, q * 100)) < 0.01 * spread
+    assert sk.count == len(values)
+    assert len(sk.means) <= 2 * sk.compression
+
+
+def test_merge_matches_single_sketch():
+    rng = np.random.default_rng(1)
+    a, b = rng.normal(0, 1, 50_000), rng.normal(3, 2, 20_000)
+    merged = QuantileSketch().update(a).merge(QuantileSketch().update(b))
+    exact = np.concatenate([a, b])
+    spread = np.percentile(exact, 75) - np.percentile(exact, 25)
+    for q in (0.25, 0.75):
+        assert abs(merged.quantile(q) - np.percentile(exact, q * 100)) < 0.01 * spread
+
+
+def test_ignores_nan_and_round_trips():
+    sk = QuantileSketch().update([1.0, np.nan, 2.0, 3.0])
+    assert sk.count == 3
+    again = QuantileSketch.from_dict(sk.to_dict())
+    assert again.quantile(0.5) == pytest.approx(sk.quantile(0.5))
+    assert np.isnan(QuantileSketch().quantile(0.5))
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from process import Preprocessor
+from snapshot import Snapshot
+
+
+def test_round_trip_keeps_null_clubs(store):
+    df = Preprocessor(store=store, backend='pandas').process_data()
+    assert df['Club'].isna().any()
+    snapshot = Snapshot(store)
+    snapshot.publish(df, store.version())
+    back = snapshot.load(store.version())
+    pd.testing.assert_frame_equal(back, df, check_categorical=False)
+    assert back['Club'].isna().sum() == df['Club'].isna().sum()
+    assert list(back['Club'].cat.categories) == list(df['Club'].cat.categories)
+
+
+def test_projection_and_stale_version(store):
+    df = Preprocessor(store=store, backend='pandas').process_data()
+    snapshot = Snapshot(store)
+    snapshot.publish(df, store.version())
+    back = snapshot.load(store.version(), columns=['Date', 'Club', 'Carry'])
+    assert set(back.columns) == {'Date', 'Club', 'Carry'}
+    assert np.array_equal(back['Carry'].to_numpy(), df['Carry'].to_numpy(), equal_nan=True)
+    assert snapshot.load(store.version() + 1) is None
+
+
+def test_only_publish_snapshot_writes(store):
+    snapshot = Snapshot(store)
+    df = Preprocessor(store=store).shared_data() #reader miss - processed, nothing written
+    assert snapshot.current() is None
+    Preprocessor(store=store).publish_snapshot()
+    assert snapshot.is_current(store.version())
+    pd.testing.assert_frame_equal(Preprocessor(store=store).shared_data(), df, check_categorical=False)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from schema import enforce_schema
+from utils import filter_data, distinct, min_max
+
+
+#plain boolean-mask filter - what filter_data did before the index
+def mask_filter(df, date_range, selected_club):
+    mask = df['Date'].between(pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1]))
+    if isinstance(selected_club, list):
+        if not ('All' in selected_club and len(selected_club) == 1):
+            mask &= df['Club'].isin(selected_club)
+    elif selected_club != 'All':
+        mask &= df['Club'] == selected_club
+    return df[mask]
+
+
+def selections(df, n = 30, seed = 0):
+    rng = np.random.default_rng(seed)
+    dates = df['Date'].sort_values().to_numpy()
+    clubs = list(df['Club'].dropna().unique())
+    for _ in range(n):
+        lo, hi = np.sort(rng.choice(dates, 2))
+        club = rng.choice(['All', 'one', 'many', 'missing'])
+        if club == 'one':
+            club = str(rng.choice(clubs))
+        elif club == 'many':
+            club = [str(c) for c in rng.choice(clubs, 3, replace=False)]
+        elif club == 'missing':
+            club = ['XX']
+        yield (lo, hi), club
+
+
+@pytest.mark.parametrize('order', ['sorted', 'shuffled'])
+def test_index_matches_mask(shots, order):
+    df = enforce_schema(shots)
+    if order == 'sorted':
+        df = df.sort_values('Date', kind='stable').reset_index(drop=True)
+    else:
+        df = df.sample(frac=1, random_state=0)
+    for date_range, club in selections(df):
+        pd.testing.assert_frame_equal(filter_data(df, date_range, club).sort_index(), mask_filter(df, date_range, club).sort_index())
+
+
+def test_full_range_is_a_slice(shots):
+    df = enforce_schema(shots).sort_values('Date', kind='stable').reset_index(drop=True)
+    out = filter_data(df, (df['Date'].min(), df['Date'].max()), 'All')
+    assert out.shape == df.shape and np.shares_memory(out['Carry'].to_numpy(), df['Carry'].to_numpy())
+
+
+def test_distinct_and_min_max(shots):
+    df = enforce_schema(shots)
+    assert distinct(df, 'Club') == list(df['Club'].dropna().unique())
+    assert min_max(df, 'Date') == (df['Date'].min(), df['Date'].max())
@@ -0,0 +1,104 @@
+#load packages
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from cache import shared_cache
+
+
+#datetime axes are fit on epoch seconds and mapped back for drawing
+def _as_float(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9, True
+    return values.to_numpy(dtype=np.float64), False
+
+def _from_float(values, is_date):
+    return pd.to_datetime(values * 1e9) if is_date else values
+
+
+def ols_lines(df, x, y, group = None):
+    '''
+    Least squares line per group from grouped sums (one pass, no model objects).
+    Returns two points per group - the fit at the group's min and max x.
+    '''
+    xs, is_date = _as_float(df[x])
+    ys = df[y].to_numpy(dtype=np.float64)
+    keys = df[group].astype(str).to_numpy() if group is not None else np.zeros(len(xs), dtype=object)
+    valid = ~(np.isnan(xs) | np.isnan(ys))
+    frame = pd.DataFrame({'g': keys[valid], 'x': xs[valid], 'y': ys[valid]})
+    if frame.shape[0] == 0:
+        return pd.DataFrame(columns=([group] if group else []) + [x, y])
+    frame['xx'] = frame['x'] ** 2
+    frame['xy'] = frame['x'] * frame['y']
+    s = frame.groupby('g', sort=False).agg(n=('x', 'size'), sx=('x', 'sum'), sy=('y', 'sum'), sxx=('xx', 'sum'),
+                                           sxy=('xy', 'sum'), lo=('x', 'min'), hi=('x', 'max'))
+    s = s[s['n'] >= 2]
+    denom = s['n'] * s['sxx'] - s['sx'] ** 2
+    slope = ((s['n'] * s['sxy'] - s['sx'] * s['sy']) / denom.where(denom != 0)).fillna(0.0)
+    intercept = (s['sy'] - slope * s['sx']) / s['n']
+
+    xs_line = np.column_stack([s['lo'], s['hi']]).ravel()
+    out = pd.DataFrame({x: _from_float(xs_line, is_date),
+                        y: np.repeat(intercept.to_numpy(), 2) + np.repeat(slope.to_numpy(), 2) * xs_line})
+    if group is not None:
+        out.insert(0, group, np.repeat(s.index.to_numpy(), 2))
+    return out
+
+
+def lowess_curve(df, x, y, frac = 2 / 3, bins = 200):
+    '''
+    LOWESS over binned data - points are averaged into up to `bins` equal-count x bins and a
+    count-weighted local linear fit (tricube kernel, window = frac of all shots) is run on the bin
+    centers. Cost depends on bins, not on the number of shots.
+    '''
+    xs, is_date = _as_float(df[x])
+    ys = df[y].to_numpy(dtype=np.float64)
+    valid = ~(np.isnan(xs) | np.isnan(ys))
+    xs, ys = xs[valid], ys[valid]
+    if len(xs) < 3:
+        return pd.DataFrame(columns=[x, y])
+
+    #equal-count bins over the sorted x
+    order = np.argsort(xs, kind='stable')
+    xs, ys = xs[order], ys[order]
+    edges = np.linspace(0, len(xs), min(bins, len(xs)) + 1).astype(np.int64)
+    bin_id = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+    w = np.bincount(bin_id).astype(np.float64)
+    bx = np.bincount(bin_id, weights=xs) / w
+    by = np.bincount(bin_id, weights=ys) / w
+
+    #window per bin center: nearest bins until frac of the shots are covered
+    dist = np.abs(bx[:, None] - bx[None, :])
+    nearest = np.argsort(dist, axis=1, kind='stable')
+    covered = np.cumsum(w[nearest], axis=1)
+    reach = np.argmax(covered >= frac * w.sum(), axis=1)
+    h = np.take_along_axis(dist, nearest, axis=1)[np.arange(len(bx)), reach]
+    h = np.maximum(h, 1e-12)
+    k = np.clip(dist / h[:, None], 0, 1)
+    kw = w[None, :] * (1 - k ** 3) ** 3
+
+    #weighted local linear fit at each center
+    sw = kw.sum(axis=1)
+    mx = (kw * bx).sum(axis=1) / sw
+    my = (kw * by).sum(axis=1) / sw
+    dx = bx[None, :] - mx[:, None]
+    sxx = (kw * dx ** 2).sum(axis=1)
+    sxy = (kw * dx * (by[None, :] - my[:, None])).sum(axis=1)
+    slope = np.where(sxx > 0, sxy / np.where(sxx > 0, sxx, 1), 0.0)
+    fitted = my + slope * (bx - mx)
+    return pd.DataFrame({x: _from_float(bx, is_date), y: fitted})
+
+
+#memoize a fitted curve - key starts with the data version so a new ingest drops old fits
+def cached_trend(key, compute):
+    return shared_cache.get_or_compute(key, compute)
+
+
+#draw fitted curves as plain line traces, colored like the scatter trace of the same group
+def add_trend_traces(fig, lines, x, y, group = None, color = None):
+    colors = {t.name: t.marker.color for t in fig.data if getattr(t, 'marker', None) is not None}
+    groups = lines.groupby(group, sort=False) if group is not None else [(None, lines)]
+    for name, part in groups:
+        fig.add_trace(go.Scatter(x=part[x], y=part[y], mode='lines', name=f"{name} trend" if name else 'trend',
+                                 legendgroup=name, showlegend=False, hoverinfo='skip',
+                                 line=dict(color=colors.get(name, color), width=2)))
+    return fig
@@ -0,0 +1,75 @@
+#load packages
+import pandas as pd
+import numpy as np
+
+#unit suffixes gspro can put on a value, mapped to (dimension, factor to base unit)
+#base units: length -> yards, speed -> mph
+UNITS = {
+    'yds': ('length', 1.0),
+    'yd': ('length', 1.0),
+    'yards': ('length', 1.0),
+    'ft': ('length', 1 / 3),
+    'feet': ('length', 1 / 3),
+    "'": ('length', 1 / 3),
+    'in': ('length', 1 / 36),
+    '"': ('length', 1 / 36),
+    'm': ('length', 1.0936133),
+    'meters': ('length', 1.0936133),
+    'cm': ('length', 0.010936133),
+    'mph': ('speed', 1.0),
+    'kph': ('speed', 0.62137119),
+    'km/h': ('speed', 0.62137119),
+    'm/s': ('speed', 2.2369363),
+    'mps': ('speed', 2.2369363),
+}
+
+#"72.72 yds", "12ft", "-3.5 m" -> value + unit in one regex pass
+UNIT_PATTERN = r'^\s*(?P<value>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*(?P<unit>[A-Za-z/\'"]*)\s*$'
+
+
+def split_units(col):
+    '''Vectorized split of a unit-suffixed string column into float values and lower-case units'''
+    parts = col.astype('string').str.extract(UNIT_PATTERN)
+    values = pd.to_numeric(parts['value'], errors='coerce').astype(np.float64)
+    units = parts['unit'].str.lower()
+    return values, units
+
+
+def to_base_units(col, default_unit = None):
+    '''
+    Convert a unit-suffixed column to floats in the base unit of its dimension (yards / mph).
+    Values with no suffix take default_unit, unknown units become NaN.
+    '''
+    if pd.api.types.is_numeric_dtype(col):
+        return col.astype(np.float64)
+    values, units = split_units(col)
+    if default_unit is not None:
+        units = units.mask(units.isna() | (units == ''), default_unit)
+    factors = units.map({u: f for u, (dim, f) in UNITS.items()}).astype(np.float64)
+    return (values * factors).astype(np.float64)
+
+
+def to_yards(col):
+    return to_base_units(col, default_unit='yds')
+
+
+def unit_columns(df, min_share = 0.5):
+    '''Find string columns where most non-null values look like "<number> <known unit>"'''
+    found = []
+    for name in df.select_dtypes(exclude='number').columns:
+        col = df[name].dropna()
+        if len(col) == 0:
+            continue
+        _, units = split_units(col)
+        dims = units.map({u: dim for u, (dim, f) in UNITS.items()})
+        if dims.notna().mean() >= min_share:
+            found.append(name)
+    return found
+
+
+def normalize_units(df):
+    '''Replace every unit-suffixed column with its float value in base units (length -> yards)'''
+    df = df.copy()
+    for name in unit_columns(df):
+        df[name] = to_base_units(df[name])
+    return df
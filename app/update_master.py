@@ -1,141 +1,275 @@
 #load packages
 import pandas as pd
-import numpy as np
 import os
 import json
 import datetime
+import argparse
 import traceback
 import shutil
 from pathlib import Path
-from create_init import clean
+from create_init import clean_many, export_ts
+from store import DEFAULT_PLAYER, PLAYER_NAME, player_store
+from rollup import RollupCube
+from process import Preprocessor
+from ingest_manifest import IngestManifest
 
 
-# #set paths 
+# #set paths
 base_path = Path(__file__).resolve().parent #path of script
 csv_path = base_path.parent #path of csv files
-out_path = base_path / "master.csv" #path for output 
+out_path = base_path / "master.csv" #legacy master, only used to seed the store
 desktop_path = csv_path.parent
+filename = base_path / 'log.json' #legacy run log, imported into the ingest manifest once
+players_path = csv_path / 'players' #exports of other golfers, one folder per player
+
+
+#where a player's exports are kept - the default player uses the original folder
+def export_folder(player = DEFAULT_PLAYER):
+    return csv_path if player == DEFAULT_PLAYER else players_path / player
+
+
+#players that have an export folder, default first
+def export_players():
+    found = [DEFAULT_PLAYER]
+    if players_path.exists():
+        found += sorted(e.name for e in os.scandir(players_path) if e.is_dir() and PLAYER_NAME.match(e.name))
+    return found
 
 
 #GSPRO exports to desktop
-#check for new gspro files in desktop and move to folder
-#print(gspro_files)
-try:
-    gspro_files = [f for f in os.listdir(desktop_path) if f.startswith("gspro")]
-    for f in gspro_files:
-        source = os.path.join(desktop_path, f)
-        dest = os.path.join(csv_path, f)
-        shutil.move(source, dest)
-        print(f"File {f} moved to {csv_path} successfully")
-
-except Exception as e:
-    print(f"Error occurred, {str(e)}")
-
-
-
-#open current log file and grab last run date 
-filename = base_path / 'log.json'
-with open(filename, "r") as f:
-    current_log = json.load(f)
-
-idx = len(current_log) - 1
-target_ts = pd.to_datetime(current_log[idx]['last_run'])
-
-#set initial log status
-status = 'failure'
-err = None
-new_dfs = []
-
-try:
-    #collect files that need to be added 
-    files = [f for f in os.listdir(csv_path) if f.endswith(".csv")]
-    files_to_process = []
-    df_lens = []
- 
-    for file in files:
+#check for new gspro files in desktop and move to the folder of the player at the simulator
+def move_exports(player = DEFAULT_PLAYER):
+    try:
+        gspro_files = [f for f in os.listdir(desktop_path) if f.startswith("gspro")]
+        for f in gspro_files:
+            move_export(os.path.join(desktop_path, f), player)
+
+    except Exception as e:
+        print(f"Error occurred, {str(e)}")
+
+
+def move_export(source, player = DEFAULT_PLAYER):
+    folder = export_folder(player)
+    os.makedirs(folder, exist_ok=True)
+    dest = os.path.join(folder, os.path.basename(source))
+    shutil.move(source, dest)
+    print(f"File {os.path.basename(source)} moved to {folder} successfully")
+    return dest
+
+
+def load_log():
+    if filename.exists():
+        with open(filename, "r") as f:
+            return json.load(f)
+    return []
+
+
+#seed the store from the legacy master once, picking up the last successful run as watermark
+def open_store(current_log, player = DEFAULT_PLAYER):
+    store = player_store(player)
+    if player == DEFAULT_PLAYER and not store.exists() and out_path.exists():
+        last_success = [l['last_run'] for l in current_log if l['status'] == 'success']
+        store.seed_from_csv(out_path, watermark=last_success[-1] if len(last_success) > 0 else None, sources=legacy_sources())
+        print(f"Shot store seeded from {out_path}")
+    return store
+
+
+#export behind each legacy master session, keyed by minute (the master's Date resolution) -
+#minutes with more than one export are ambiguous and stay under the master's name
+def legacy_sources():
+    found = {}
+    for f in os.listdir(csv_path):
         try:
-            ts_str = str(file).split("export")[-1].split(".csv")[0]
-            dt = pd.to_datetime(ts_str, format='%m-%d-%y-%H-%M-%S') #convert to dt 
+            if f.endswith(".csv"):
+                found.setdefault(export_ts(f).floor('min'), []).append(f)
+        except Exception:
+            continue
+    return {ts: names[0] for ts, names in found.items() if len(names) == 1}
 
-            if dt > target_ts:
-                files_to_process.append(file)
-        except Exception as e:
-            print(f"Skipping {file} - date parsing error, {str(e)}")
-            continue 
 
-    #process new files if the last run was successful
-    if len(files_to_process) != 0 and current_log[idx]['status'] == 'success':
-        for i, f in enumerate(files_to_process):
-            try:
-                file_path = os.path.join(csv_path, f)
-                df = clean(file_path)
-                df = df.iloc[1:, :] #drop header row 
-                new_dfs.append(df)
-                df_lens.append(df.shape[0])
-                print(f" Processed file {i + 1}/{len(files_to_process)}")
-       
-            except Exception as e:
-                status = 'failure'
-                err = f"Error processing: {str(e)}"
-                print("Unable to complete processing", err)
-                break
-
-        #update master file if all files were processed successfully 
-        if len(new_dfs) == len(files_to_process):
+#first run on the hash manifest: register exports that are already in the store
+#(everything up to the old timestamp watermark) so they are not ingested twice
+#other players start clean, their manifest lives in their own partition
+def open_manifest(store, current_log, player = DEFAULT_PLAYER):
+    if player != DEFAULT_PLAYER:
+        store.root.mkdir(parents=True, exist_ok=True)
+        return IngestManifest(db=store.root / '_ingest.db')
+    manifest = IngestManifest()
+    if manifest.is_empty() and store.watermark() is not None:
+        target_ts = pd.to_datetime(store.watermark())
+        legacy = []
+        for f in os.listdir(csv_path):
             try:
-                master_df = pd.read_csv(out_path)
-                new_data = pd.concat(new_dfs, ignore_index = True)
-                expected_rows = sum(df_lens)
-                assert expected_rows == new_data.shape[0], "Row count mismatch in new data"
-
-
-                new_master = pd.concat([master_df, new_data], ignore_index = True)
-                new_master.to_csv(out_path, index = False)
-                status = 'success'
-                print("Master file updated successfully")
-
-            except Exception as e:
-                status = 'failure'
-                err = f"Master file update failed: {str(e)}"
-                print("Unable to update Master file", err)
-
-    elif len(files_to_process) == 0:
-        status = 'success'  
-        print("No new files to process")
-    
-    else:
+                if f.endswith(".csv") and export_ts(f) <= target_ts:
+                    legacy.append((manifest.hash(os.path.join(csv_path, f)), f, None))
+            except Exception:
+                continue
+        manifest.record(legacy, {}, store.version())
+        manifest.import_log(current_log)
+        print(f"Registered {len(legacy)} previously ingested files in the ingest manifest")
+    return manifest
+
+
+def ingest(paths, store, manifest, workers = 1, use_threads = False):
+    '''
+    Clean the given export files and commit them to the store in one manifest swap.
+    Files whose content hash is already ingested are skipped, so re-runs are idempotent.
+    Returns (status, err, cleaned file names, failures)
+    '''
+    status = 'failure'
+    err = None
+    cleaned = []
+    failures = {}
+
+    #hash candidates, skip content we already have (also covers renamed re-exports)
+    committed = store.source_hashes()
+    todo = {}
+    for p in paths:
+        h = manifest.hash(p)
+        name = os.path.basename(p)
+        if h in committed and not manifest.is_ingested(h):
+            manifest.record([(h, name, None)], {}, store.version()) #committed but not recorded (crash recovery)
+        if manifest.is_ingested(h) or h in todo.values():
+            continue
+        todo[p] = h
+    if len(todo) == 0:
+        print("No new content to process")
+        return 'success', None, [], {}
+
+    #clean files concurrently, merged back in export timestamp order
+    new_dfs, cleaned_paths, failed_paths = clean_many(list(todo), workers=workers, use_threads=use_threads)
+    cleaned = [os.path.basename(f) for f in cleaned_paths]
+    failures = {os.path.basename(f): e for f, e in failed_paths.items()}
+    print(f" Processed {len(cleaned)}/{len(todo)} files")
+    for f, e in failures.items():
+        print(f" Unable to process {f}: {e}")
+
+    #append new sessions to the store - only the new exports are written,
+    #cost scales with the new files, not the archive
+    try:
+        hashes = [todo[p] for p in cleaned_paths]
+        #names ingested before with different content are re-exports, their old segments are replaced
+        replace = [name for name, h in zip(cleaned, hashes) if len(manifest.hashes_for(name)) > 0]
+        segments = store.append(new_dfs, sources=cleaned, hashes=hashes, replace=replace,
+                                watermark=datetime.datetime.now().isoformat())
+        expected_rows = sum(df.shape[0] for df in new_dfs)
+        assert sum(seg['rows'] for seg in segments) == expected_rows, "Row count mismatch in committed segments"
+
+        rows = {}
+        for seg in segments:
+            rows[seg['source_hash']] = rows.get(seg['source_hash'], 0) + seg['rows']
+        manifest.record([(h, name, rows.get(h, 0)) for name, h in zip(cleaned, hashes)],
+                        {os.path.basename(p): (todo[p], e) for p, e in failed_paths.items()},
+                        store.version())
+
+        #fold the new segments into the outlier quantile sketches and the session/club rollup
+        RollupCube(store).sync()
+        #publish the cleaned, memory-mapped snapshot that pages in every process share
+        Preprocessor(store=store).publish_snapshot()
+        status = 'success' if len(failures) == 0 else 'partial'
+        if len(failures) > 0:
+            err = f"{len(failures)} file(s) failed, will retry next run"
+        print(f"Shot store updated successfully (version {store.version()})")
+
+    except Exception as e:
         status = 'failure'
-        err = "Last run was unsuccessful, cannot process new files. Please confirm target date"
-        print(err)
+        err = f"Shot store update failed: {str(e)}"
+        cleaned = []
+        print("Unable to update shot store", err)
+
+    return status, err, cleaned, failures
+
+
+#ingest new exports - desktop exports belong to `player`, then every player's folder (or just `player`'s) is synced
+def main(workers = 1, use_threads = False, player = None):
+    move_exports(player or DEFAULT_PLAYER)
+    statuses = [ingest_player(p, workers, use_threads) for p in ([player] if player else export_players())]
+    return 'success' if all(s == 'success' for s in statuses) else 'failure' if all(s == 'failure' for s in statuses) else 'partial'
 
-except Exception as e:
+
+def ingest_player(player = DEFAULT_PLAYER, workers = 1, use_threads = False):
+    current_log = load_log() if player == DEFAULT_PLAYER else []
+    store = open_store(current_log, player)
+    manifest = open_manifest(store, current_log, player)
+    folder = export_folder(player)
+    if player != DEFAULT_PLAYER:
+        print(f"Player {player}:")
+
+    #set initial log status
     status = 'failure'
-    err = f"Unexpected error, {str(e)}"
-    print(err)
-    traceback.print_exc()
+    err = None
+    cleaned = []
+    failures = {}
 
+    try:
+        #collect files that need to be added - unchanged known files are skipped on a stat lookup,
+        #late or re-exported files are picked up whatever their timestamp
+        files_to_process = []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".csv") or not entry.is_file():
+                    continue
+                if manifest.unchanged(entry):
+                    continue
+                try:
+                    export_ts(entry.name)
+                    files_to_process.append(entry.path)
+                except Exception as e:
+                    print(f"Skipping {entry.name} - date parsing error, {str(e)}")
+                    continue
 
-                        
-#### UPDATE LOG FILE #####
-#today = datetime.date.today()
-#log_file = []
-log = {'last_run': datetime.datetime.now().isoformat(),
-        'status': status,
-        'error' : err,
-        'files_processed': files_to_process if len(files_to_process) == len(new_dfs) and status == 'success'else []}
-current_log.append(log)
+        if len(files_to_process) != 0:
+            status, err, cleaned, failures = ingest(files_to_process, store, manifest, workers=workers, use_threads=use_threads)
+        else:
+            status = 'success'
+            print("No new files to process")
 
-with open(filename, 'w') as outfile:
-    json.dump(current_log, outfile, indent = 2)
+    except Exception as e:
+        status = 'failure'
+        err = f"Unexpected error, {str(e)}"
+        print(err)
+        traceback.print_exc()
 
+    #### UPDATE LOG #####
+    manifest.log_run(status, err, store.version(), cleaned, failures)
+    manifest.close()
+    return status
 
-print(f"Log data written to '{filename}' successfully.")
 
-            
-                            
-                
-                     
-                            
+#long running mode - ingest each export as soon as gspro finishes writing it
+def watch(poll = False, settle = 2.0, player = DEFAULT_PLAYER):
+    from watcher import ExportWatcher
 
+    main(player=player) #catch up on anything exported while the watcher was down
+    store = open_store([], player)
+    manifest = open_manifest(store, [], player)
 
+    def on_export(path):
+        try:
+            dest = move_export(path, player)
+            status, err, cleaned, failures = ingest([dest], store, manifest)
+        except Exception as e:
+            status, err, cleaned, failures = 'failure', f"Unexpected error, {str(e)}", [], {}
+            traceback.print_exc()
+        manifest.log_run(status, err, store.version(), cleaned, failures)
+
+    print(f"Watching {desktop_path} for GSPro exports of player {player} (ctrl+c to stop)")
+    ExportWatcher(desktop_path, on_export, prefix="gspro", suffix=".csv", settle=settle, poll=poll).run()
 
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ingest new GSPro exports into the shot store")
+    parser.add_argument('--workers', type=int, default=1, help="number of files cleaned in parallel (default 1)")
+    parser.add_argument('--threads', action='store_true', help="use a thread pool instead of a process pool")
+    parser.add_argument('--watch', action='store_true', help="keep running and ingest new exports as they land")
+    parser.add_argument('--poll', action='store_true', help="with --watch, poll the folder instead of using filesystem events")
+    parser.add_argument('--settle', type=float, default=2.0, help="seconds a file must stay unchanged before it is ingested")
+    parser.add_argument('--player', default=None, help="golfer the new desktop exports belong to (default: the original single player); "
+                                                       "without it every player folder is synced")
+    args = parser.parse_args()
+    if args.player is not None and args.player != DEFAULT_PLAYER and not PLAYER_NAME.match(args.player):
+        parser.error("player names may only use letters, digits, _ and -")
+    if args.watch:
+        watch(poll=args.poll, settle=args.settle, player=args.player or DEFAULT_PLAYER)
+    else:
+        main(workers=args.workers, use_threads=args.threads, player=args.player)
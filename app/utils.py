@@ -1,16 +1,94 @@
-import pandas as pd 
+import weakref
+import numpy as np
+import pandas as pd
+from perf import timed, count
+from query import LazyShots
 
-#filter data 
-def filter_data(data, date_range, selected_club):
-    filtered = data[data['Date'].between(pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1]))]
 
+class ShotIndex:
+    '''
+    Date + club index over a shot frame.
+    Rows are looked up in Date order with a binary search (searchsorted) and each club keeps
+    its own sorted row positions, so a date range + club filter is O(log n + k) instead of a
+    full boolean mask over the frame.
+    '''
+    def __init__(self, data):
+        dates = data['Date'].to_numpy(dtype='datetime64[ns]')
+        #Preprocessor keeps the data sorted by Date, anything else is indexed through an argsort
+        self.order = None if data['Date'].is_monotonic_increasing else np.argsort(dates, kind='stable')
+        self.dates = dates if self.order is None else dates[self.order]
+
+        clubs = data['Club'] if self.order is None else data['Club'].iloc[self.order] #positions in date order
+        codes, labels = pd.factorize(clubs.astype(str) if clubs.dtype != 'category' else clubs.cat.remove_unused_categories())
+        by_code = np.argsort(codes, kind='stable') #positions grouped by club, still in date order
+        splits = np.cumsum(np.bincount(codes[codes >= 0], minlength=len(labels)))[:-1]
+        self.club_rows = dict(zip([str(l) for l in labels], np.split(by_code[codes[by_code] >= 0], splits)))
+
+    #row positions (in date order) for a date range and club selection
+    def positions(self, date_range, clubs = None):
+        start = np.datetime64(pd.to_datetime(date_range[0]), 'ns')
+        end = np.datetime64(pd.to_datetime(date_range[1]), 'ns')
+        lo = np.searchsorted(self.dates, start, side='left')
+        hi = np.searchsorted(self.dates, end, side='right')
+        if clubs is None:
+            pos = np.arange(lo, hi)
+        else:
+            parts = []
+            for club in dict.fromkeys(clubs): #ignore repeated selections
+                rows = self.club_rows.get(str(club))
+                if rows is not None:
+                    parts.append(rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)])
+            pos = np.sort(np.concatenate(parts)) if len(parts) > 0 else np.empty(0, dtype=np.int64)
+        return pos if self.order is None else self.order[pos]
+
+
+#one index per loaded frame, dropped when the frame is garbage collected
+_indexes = {}
+
+def get_index(data):
+    entry = _indexes.get(id(data))
+    if entry is not None and entry[0]() is data:
+        return entry[1]
+    index = ShotIndex(data)
+    key = id(data)
+    _indexes[key] = (weakref.ref(data, lambda _: _indexes.pop(key, None)), index)
+    return index
+
+
+#filter data
+@timed('filter_data')
+def filter_data(data, date_range, selected_club):
+    clubs = None
     if isinstance(selected_club, list):
         if 'All' in selected_club and len(selected_club) == 1:
-            pass  
+            pass
         else:
-            filtered = filtered[filtered['Club'].isin(selected_club)]
+            clubs = selected_club
     else:
         if selected_club != 'All':
-            filtered = filtered[filtered['Club'] == selected_club]
+            clubs = [selected_club]
+
+    if isinstance(data, LazyShots): #out-of-core backend - predicates pushed into the scan
+        df = data.filter(date_range, clubs)
+        count('filter_data.rows', df.shape[0])
+        return df
+
+    pos = get_index(data).positions(date_range, clubs)
+    count('filter_data.rows', len(pos))
+    if clubs is None and len(pos) > 0 and pos[-1] - pos[0] + 1 == len(pos):
+        return data.iloc[pos[0]:pos[-1] + 1] #contiguous date slice
+    return data.iloc[pos]
+
+
+#distinct non-null values of a column in order of appearance - pushed into the scan for the lazy backend
+def distinct(data, col):
+    if isinstance(data, LazyShots):
+        return data.distinct(col)
+    return list(data[col].dropna().unique())
+
 
-    return filtered
+#(min, max) of a column - one aggregate query for the lazy backend instead of materializing the column
+def min_max(data, col):
+    if isinstance(data, LazyShots):
+        return data.min_max(col)
+    return data[col].min(), data[col].max()
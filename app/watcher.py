@@ -0,0 +1,118 @@
+#load packages
+import os
+import time
+import threading
+from pathlib import Path
+
+#filesystem events (inotify / FSEvents / ReadDirectoryChangesW) when watchdog is installed
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class ExportWatcher:
+    '''
+    Watches a folder and hands each new export file to callback(path) once it is fully written.
+    A file counts as written once its size and mtime have not changed for `settle` seconds.
+    Uses filesystem events when available, otherwise polls the folder every `interval` seconds.
+    '''
+    def __init__(self, folder, callback, prefix = '', suffix = '', settle = 2.0, poll = False, interval = 0.5):
+        self.folder = Path(folder)
+        self.callback = callback
+        self.prefix = prefix
+        self.suffix = suffix
+        self.settle = settle
+        self.poll = poll or Observer is None
+        self.interval = interval
+        self.candidates = {} #path -> (size, mtime, time of last change)
+        self.handled = set() #(path, size, mtime) already passed to callback
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def matches(self, path):
+        name = os.path.basename(path)
+        return name.startswith(self.prefix) and name.endswith(self.suffix)
+
+    #called on create/modify events (or by the poller) - restarts the debounce clock on any change
+    def notify(self, path):
+        path = str(path)
+        if not self.matches(path):
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        with self.lock:
+            prev = self.candidates.get(path)
+            if prev is None or prev[:2] != (st.st_size, st.st_mtime):
+                self.candidates[path] = (st.st_size, st.st_mtime, time.monotonic())
+
+    #hand off files that have been stable for the settle window
+    def check_ready(self):
+        now = time.monotonic()
+        ready = []
+        with self.lock:
+            for path, (size, mtime, changed) in list(self.candidates.items()):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    del self.candidates[path] #moved or deleted
+                    continue
+                if (st.st_size, st.st_mtime) != (size, mtime):
+                    self.candidates[path] = (st.st_size, st.st_mtime, now)
+                elif now - changed >= self.settle and st.st_size > 0:
+                    del self.candidates[path]
+                    if (path, size, mtime) not in self.handled:
+                        self.handled.add((path, size, mtime))
+                        ready.append(path)
+        for path in sorted(ready):
+            self.callback(path)
+
+    #polling fallback - only looks at the watched folder's entries, no file parsing
+    def scan(self):
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file() and self.matches(entry.name):
+                    self.notify(entry.path)
+
+    def run(self):
+        observer = None
+        if not self.poll:
+            observer = Observer()
+            observer.schedule(_ExportEventHandler(self), str(self.folder), recursive=False)
+            observer.start()
+        try:
+            while not self.stop_event.is_set():
+                if observer is None:
+                    self.scan()
+                self.check_ready()
+                self.stop_event.wait(self.interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class _ExportEventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.src_path)
+
+    def on_moved(self, event): #exports written to a temp name then renamed
+        if not event.is_directory:
+            self.watcher.notify(event.dest_path)